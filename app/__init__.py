@@ -4,11 +4,12 @@ from datetime import timedelta
 from flask_mail import Mail
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from flask_migrate import Migrate
 from flask_restful import Api
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
+from app.utils import db_pool
+from app.utils.rate_limit import rate_limit_key
+from app.utils.serialization import output_json
 
 import os
 
@@ -16,18 +17,17 @@ db = SQLAlchemy()
 mail = Mail()
 jwt = JWTManager()
 api = Api()
-migrate = Migrate()
+# Shared by every resource module; storage and strategy come from RATELIMIT_* config
+limiter = Limiter(
+    key_func=rate_limit_key,
+    default_limits=["200 per day", "50 per hour"]
+)
 
 def create_app():
     load_dotenv()
     app = Flask(__name__)
     CORS(app, resources={r"/*": {"origins": "*"}})
     
-    limter = Limiter(
-        key_func=get_remote_address,
-        app=app,
-        default_limits=["200 per day", "50 per hour"]
-    )
     @app.errorhandler(429)
     def ratelimit_handler(e):
         return {"message": "ratelimit exceeded %s" % e.description}, 429
@@ -45,6 +45,15 @@ def create_app():
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Database pool Configuration, see app/utils/db_pool.py for sizing
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_pool.engine_options(app.config)
+    
     # Mail Configuration
     app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
     app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT'))
@@ -53,17 +62,73 @@ def create_app():
     app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
+    app.config['NOTIFICATION_MAX_ATTEMPTS'] = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', 5))
     
     # Payment Configuration
     app.config['PAYSTACK_SECRET_KEY'] = os.getenv('PAYSTACK_SECRET_KEY')
     app.config['PAYSTACK_PUBLIC_KEY'] = os.getenv('PAYSTACK_PUBLIC_KEY')
     app.config['PAYSTACK_BASE_URL'] = os.getenv('PAYSTACK_BASE_URL', "https://api.paystack.co")
     
+    # Outbound HTTP client Configuration (Paystack, Arkesel)
+    app.config['HTTP_CONNECT_TIMEOUT'] = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+    app.config['HTTP_READ_TIMEOUT'] = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+    app.config['HTTP_POOL_MAXSIZE'] = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+    app.config['HTTP_MAX_RETRIES'] = int(os.getenv('HTTP_MAX_RETRIES', 2))
+    app.config['HTTP_BREAKER_THRESHOLD'] = int(os.getenv('HTTP_BREAKER_THRESHOLD', 5))
+    app.config['HTTP_BREAKER_COOLDOWN'] = float(os.getenv('HTTP_BREAKER_COOLDOWN', 30))
+    
+    # Product cache Configuration
+    app.config['PRODUCT_CACHE_BACKEND'] = os.getenv('PRODUCT_CACHE_BACKEND', 'memory')
+    app.config['PRODUCT_CACHE_SIZE'] = int(os.getenv('PRODUCT_CACHE_SIZE', 1024))
+    app.config['PRODUCT_CACHE_TTL'] = int(os.getenv('PRODUCT_CACHE_TTL', 300))
+    app.config['REDIS_URL'] = os.getenv('REDIS_URL')
+    app.config['CATALOG_CACHE_MAX_AGE'] = int(os.getenv('CATALOG_CACHE_MAX_AGE', 60))
+    
+    # Minutes an unpaid order holds its stock
+    app.config['STOCK_RESERVATION_TTL_MINUTES'] = int(os.getenv('STOCK_RESERVATION_TTL_MINUTES', 15))
+    
+    # Hours a stored Idempotency-Key response can be replayed
+    app.config['IDEMPOTENCY_TTL_HOURS'] = int(os.getenv('IDEMPOTENCY_TTL_HOURS', 24))
+    
+    # Days processed Paystack webhook events are kept for audit (flask webhooks purge)
+    app.config['WEBHOOK_EVENT_RETENTION_DAYS'] = int(os.getenv('WEBHOOK_EVENT_RETENTION_DAYS', 30))
+    
+    # Fail requests that exceed their declared query budget (enable in tests)
+    app.config['QUERY_BUDGET_ENFORCE'] = os.getenv('QUERY_BUDGET_ENFORCE', 'False').lower() == 'true'
+    
+    # Password hashing, PASSWORD_HASH_METHOD is any werkzeug method e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000
+    # Each gunicorn worker runs its own pool of PASSWORD_HASH_WORKERS processes, 0 hashes inline
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 1))
+    app.config['PASSWORD_HASH_QUEUE'] = int(os.getenv('PASSWORD_HASH_QUEUE', 4))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Rate limit Configuration, use redis:// or memcached:// so limits are shared across workers
+    app.config['RATELIMIT_STORAGE_URI'] = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+    app.config['RATELIMIT_STRATEGY'] = os.getenv('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    
     # Initialize extensions
     db.init_app(app)
     mail.init_app(app)
     jwt.init_app(app)
-    migrate.init_app(app, db)  
+    limiter.init_app(app)
+    db_pool.init_app(app, db)
+    
+    from app.utils.cache import product_cache
+    from app.utils import query_budget
+    from app.utils.http_client import http_client
+    from app.utils.passwords import password_hasher
+    from app.utils import metrics
+    product_cache.init_app(app)
+    query_budget.init_app(app)
+    http_client.init_app(app)
+    password_hasher.init_app(app)
+    metrics.init_app(app, limiter)
+    
+    # CLI commands and Flask-Migrate (which pulls in alembic) are only needed
+    # under the flask command, so web workers skip importing them
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        register_cli(app)
     
    
 
@@ -71,12 +136,13 @@ def create_app():
     # Import and register resources
     from app.resources.auth_resource import RegisterResource, VerifyUserResource, LoginResource, ForgotPasswordResource, ResetPasswordResource
     from app.resources.user_resource import UserProfileResource
-    from app.resources.product_resource import ProductListResource, ProductDetailResource
-    from app.resources.cart_resource import CartResource, AddToCartResource,UpdateCartResource, RemoveFromCartResource, ClearCartResource
+    from app.resources.product_resource import ProductListResource, ProductSearchResource, ProductDetailResource, ProductCacheStatsResource
+    from app.resources.cart_resource import CartResource, AddToCartResource,UpdateCartResource, RemoveFromCartResource, ClearCartResource, BatchCartResource
     from app.resources.orders_resource import OrderListResource, OrderDetailResource,OrderPaymentupdateResource
     from app.resources.payment_resource import InitializePaymentResource,VerifyPaymentResource, PaystackWebhookResource
     
     api = Api(app)
+    api.representations['application/json'] = output_json
     
     # Auth Resource
     api.add_resource(RegisterResource, '/auth/register')
@@ -90,6 +156,8 @@ def create_app():
     
     # Product Resource
     api.add_resource(ProductListResource, '/products')
+    api.add_resource(ProductSearchResource, '/products/search')
+    api.add_resource(ProductCacheStatsResource, '/products/cache-stats')
     api.add_resource(ProductDetailResource, '/products/<int:product_id>')
     
     # Cart Resource
@@ -98,6 +166,7 @@ def create_app():
     api.add_resource(UpdateCartResource, '/cart/update/<int:cart_item_id>')
     api.add_resource(RemoveFromCartResource, '/cart/remove/<int:cart_item_id>') 
     api.add_resource(ClearCartResource, '/cart/clear')
+    api.add_resource(BatchCartResource, '/cart/batch')
     
     # Orders Resource
     api.add_resource(OrderListResource, '/orders')
@@ -107,6 +176,32 @@ def create_app():
     # Payment Resource
     api.add_resource(InitializePaymentResource, '/checkout')
     api.add_resource(VerifyPaymentResource, '/verify/<string:reference>')
-    api.add_resource(PaystackWebhookResource, '/payment/webhook')
+    api.add_resource(PaystackWebhookResource, '/payment/webhook', endpoint='paystack_webhook')
     
-    return app
\ No newline at end of file
+    # Paystack retries and bursts deliveries; the inbox dedupes, so never rate limit it
+    limiter.exempt(app.view_functions['paystack_webhook'])
+    
+    return app
+
+
+def register_cli(app):
+    from flask_migrate import Migrate
+    from app.utils.stock import stock_cli
+    from app.utils.notifications import notifications_cli
+    from app.utils.index_check import indexes_cli
+    from app.utils.idempotency import idempotency_cli
+    from app.utils.payment_events import webhooks_cli
+    from app.utils.reconcile import payments_cli
+    from app.utils.passwords import passwords_cli
+    from app.utils.startup import startup_cli
+    from app.utils.bench import bench_cli
+    Migrate(app, db)
+    app.cli.add_command(stock_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(webhooks_cli)
+    app.cli.add_command(payments_cli)
+    app.cli.add_command(passwords_cli)
+    app.cli.add_command(startup_cli)
+    app.cli.add_command(bench_cli)
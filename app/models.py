@@ -1,6 +1,10 @@
 from app import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from app.utils.passwords import password_hasher
+from app.utils.money import to_pesewas, pesewas_to_json, total_pesewas
+from app.utils.serialization import model_serializer
 
 # -------------------------
 # User Model
@@ -33,10 +37,10 @@ class User(db.Model):
 
     # Password methods
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
     def user_to_dict(self):
         return {
@@ -55,7 +59,10 @@ class User(db.Model):
 # -------------------------
 class Order(db.Model):
     __tablename__ = 'order_table'
-    __table_args__ = {'schema': 'orders'}
+    __table_args__ = (
+        db.Index('ix_order_table_user_id_created_at', 'user_id', db.text('created_at DESC')),
+        {'schema': 'orders'}
+    )
 
     order_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('users.users_table.user_id', ondelete='CASCADE'), nullable=False)
@@ -75,14 +82,7 @@ class Order(db.Model):
     items = db.relationship("OrderItem", backref="order", lazy=True, cascade="all, delete")
 
     def to_dict(self):
-        return {
-            "order_id": self.order_id,
-            "user_id": self.user_id,
-            "total_amount": float(self.total_amount),
-            "status": self.status,
-            "created_at": self.created_at.isoformat(),
-            "items": [item.to_dict() for item in self.items]
-        }
+        return serialize_order(self)
 
 
 # -------------------------
@@ -90,6 +90,9 @@ class Order(db.Model):
 # -------------------------
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+    )
     
     order_items_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_table.order_id', ondelete='CASCADE'), nullable=False)
@@ -101,13 +104,7 @@ class OrderItem(db.Model):
     product = db.relationship('Product', backref='order_items', lazy=True)
     
     def to_dict(self):
-        return{
-            "item_id": self.order_items_id,
-            "order_id": self.order_id,
-            "product_id": self.product_id,
-            "quantity": self.quantity,
-            "price": float(self.price),
-        }
+        return serialize_order_item(self)
 
 # -------------------------
 # Payment Model
@@ -124,21 +121,32 @@ class Payment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def to_dict(self):
-        return {
-            "payment_id": self.payment_id,
-            "order_id": self.order_id,
-            "amount": float(self.amount),
-            "reference": self.reference,
-            "status": self.status,
-            "created_at": self.created_at.isoformat(),
-        }
+        return serialize_payment(self)
 
 # -------------------------
 # Product Model
 # -------------------------
+# Weighted full-text vector for /products/search (migration 3d8e5b21c7a4)
+PRODUCT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+PRODUCT_TRGM_COLUMNS = ('name', 'brand', 'size', 'color')
+
+
 class Product(db.Model):
     __tablename__ = 'products_table'
-    __table_args__ = {'schema': 'products'}
+    __table_args__ = (
+        db.Index('ix_products_created_at_product_id', db.text('created_at DESC'), db.text('product_id DESC')),
+        db.Index('ix_products_categories_id_created_at', 'categories_id', db.text('created_at DESC'), db.text('product_id DESC')),
+        db.Index('ix_products_search_vector', 'search_vector', postgresql_using='gin'),
+        *(
+            db.Index(f'ix_products_{column}_trgm', column, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+            for column in PRODUCT_TRGM_COLUMNS
+        ),
+        {'schema': 'products'}
+    )
 
     product_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     name = db.Column(db.String(150), nullable=False)
@@ -152,6 +160,8 @@ class Product(db.Model):
     image_url = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # generated by postgres; deferred so listings never load it
+    search_vector = deferred(db.Column(TSVECTOR, db.Computed(PRODUCT_SEARCH_VECTOR_SQL, persisted=True)))
 
     # Relationship
     category = db.relationship('Category', backref='products', lazy=True)
@@ -159,19 +169,7 @@ class Product(db.Model):
     cart_items = db.relationship('CartItem', backref='product', lazy=True)
 
     def to_dict(self):
-        return {
-            "product_id": self.product_id,
-            "name": self.name,
-            "description": self.description,
-            "price": float(self.price),
-            "stock": self.stock,
-            "brand": self.brand,
-            "size": self.size,
-            "color": self.color,
-            "image_url": self.image_url,
-            "category_id": self.categories_id,
-            "created_at": self.created_at.isoformat(),
-        }
+        return serialize_product(self)
 
 # -------------------------
 # Category Model
@@ -187,12 +185,7 @@ class Category(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
-        return {
-            "category_id": self.categories_id,
-            "name": self.name,
-            "description": self.description,
-            "created_at": self.created_at.isoformat(),
-        }
+        return serialize_category(self)
 
 # -------------------------
 # CartItem Model
@@ -201,6 +194,7 @@ class CartItem(db.Model):
     __tablename__ = 'cart_items'
     __table_args__ = (
         db.UniqueConstraint('user_id', 'product_id', name='unique_user_product'),
+        db.Index('ix_cart_items_cart_id_product_id', 'cart_id', 'product_id'),
         {'schema': 'cart'}
     )
 
@@ -214,15 +208,7 @@ class CartItem(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
-        return {
-            "cart_item_id": self.cart_item_id,
-            "cart_id": self.cart_id,
-            "product_id": self.product_id,
-            "quantity": self.quantity,
-            "price_at_time": float(self.price_at_time),
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return serialize_cart_item(self)
 
 
 # -------------------------
@@ -230,7 +216,12 @@ class CartItem(db.Model):
 # -------------------------
 class Cart(db.Model):
     __tablename__ = 'carts'
-    __table_args__={'schema':'cart'}
+    __table_args__ = (
+        # at most one active cart per user
+        db.Index('ux_carts_user_active', 'user_id', unique=True,
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active')),
+        {'schema': 'cart'}
+    )
     
     cart_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('users.users_table.user_id', ondelete='CASCADE'), nullable=False)
@@ -255,15 +246,132 @@ class Cart(db.Model):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "items": [item.to_dict() for item in self.items],
-            "total": float(self.total() or 0.0)
+            "total": pesewas_to_json(self.total_pesewas())
+        }
+
+    def total_pesewas(self):
+        """Compute cart total in integer pesewas from item price_at_time * quantity."""
+        return total_pesewas(
+            [to_pesewas(item.price_at_time) for item in self.items],
+            [item.quantity for item in self.items],
+        )
+
+
+# -------------------------
+# StockReservation Model
+# -------------------------
+class StockReservation(db.Model):
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        # the expiry sweep only ever looks at held rows
+        db.Index('ix_stock_reservations_held_expires_at', 'expires_at', postgresql_where=db.text("status = 'held'")),
+        {'schema': 'orders'}
+    )
+
+    reservation_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    order_id = db.Column(db.BigInteger, db.ForeignKey('orders.order_table.order_id', ondelete='CASCADE'), nullable=False, index=True)
+    product_id = db.Column(db.BigInteger, db.ForeignKey('products.products_table.product_id', ondelete='CASCADE'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), default='held', nullable=False)  # held, committed, released
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "reservation_id": self.reservation_id,
+            "order_id": self.order_id,
+            "product_id": self.product_id,
+            "quantity": self.quantity,
+            "status": self.status,
+            "expires_at": self.expires_at.isoformat(),
         }
 
-    def total(self):
-        """Compute cart total from item price_at_time * quantity."""
-        total = 0
-        for item in self.items:
-            # price_at_time is Decimal/Decimal-like; cast to float safely
-            total += float(item.price_at_time) * item.quantity
-        return round(total, 2)
+# -------------------------
+# NotificationJob Model
+# -------------------------
+class NotificationJob(db.Model):
+    __tablename__ = 'notification_jobs'
+    __table_args__ = (
+        # workers poll for due pending jobs only
+        db.Index('ix_notification_jobs_pending_run_at', 'run_at', postgresql_where=db.text("status = 'pending'")),
+        {'schema': 'notifications'}
+    )
 
-    
\ No newline at end of file
+    job_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(20), nullable=False)  # email, sms
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, done, dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "attempts": self.attempts,
+            "run_at": self.run_at.isoformat(),
+            "last_error": self.last_error,
+        }
+
+# -------------------------
+# IdempotencyKey Model
+# -------------------------
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'key', name='unique_scope_key'),
+        {'schema': 'idempotency'}
+    )
+
+    idempotency_key_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    scope = db.Column(db.String(255), nullable=False)  # endpoint and caller identity
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    status = db.Column(db.String(20), default='in_progress', nullable=False)  # in_progress, completed
+    response_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# -------------------------
+# WebhookEvent Model
+# -------------------------
+class WebhookEvent(db.Model):
+    __tablename__ = 'webhook_events'
+    __table_args__ = (
+        # the consumer only scans pending events
+        db.Index('ix_webhook_events_pending', 'webhook_event_id', postgresql_where=db.text("status = 'pending'")),
+        {'schema': 'payment'}
+    )
+
+    webhook_event_id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    event_id = db.Column(db.String(150), unique=True, nullable=False)  # "<event>:<transaction id>", or "sha256:<body hash>" without one
+    event = db.Column(db.String(100), nullable=False)
+    reference = db.Column(db.String(150), nullable=True)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, processed, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+# -------------------------
+# Serializers
+# -------------------------
+# Generated from column metadata on first use; see app/utils/serialization.py
+serialize_product = model_serializer(Product, rename={"categories_id": "category_id"}, exclude=("search_vector",))
+serialize_category = model_serializer(Category, rename={"categories_id": "category_id"}, exclude=("updated_at",))
+serialize_order_item = model_serializer(OrderItem, rename={"order_items_id": "item_id"})
+serialize_order = model_serializer(
+    Order,
+    exclude=("payment_id", "updated_at"),
+    extra={"items": lambda order: [serialize_order_item(item) for item in order.items]},
+)
+serialize_payment = model_serializer(Payment)
+serialize_cart_item = model_serializer(CartItem, exclude=("user_id",))
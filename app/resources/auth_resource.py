@@ -1,22 +1,16 @@
 from flask import request
 from flask_restful import Resource
-from werkzeug.security import generate_password_hash
-from werkzeug.security import check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token
 from app.models import db, User
-from flask_mail import Message
-from app.utils.sms_service import send_sms
+from app.utils.notifications import enqueue_email, enqueue_sms
 from app.utils.validators import validate_json
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from app import mail
+from app.utils.passwords import password_hasher, HasherBusy
+from app import limiter
 from datetime import datetime
 import string
 import random
 
-limiter = Limiter(
-    key_func=get_remote_address
-)
+BUSY_RESPONSE = {'message': 'Server is busy, please try again shortly'}, 503, {'Retry-After': '1'}
 
 # Register new user
 class RegisterResource(Resource):
@@ -38,9 +32,6 @@ class RegisterResource(Resource):
         if not username or not email or not password:
             return {"message": "Username, email and password are required "}, 400
         
-        # Hash password
-        password_hash = generate_password_hash(password)
-        
         # Generate OTP
         otp = ''.join(random.choices(string.digits, k=6))
         
@@ -59,7 +50,20 @@ class RegisterResource(Resource):
         )
         
         # Hashing the password properly
-        new_user.set_password(password)
+        try:
+            new_user.set_password(password)
+        except HasherBusy:
+            return BUSY_RESPONSE
+        
+        # Queue the OTP email (and SMS if a phone number is provided) in the same
+        # transaction as the user, delivery happens in the notification worker
+        enqueue_email(
+            subject="Verification code for hunchØ.clothing.",
+            recipients=[email],
+            body=f"Good day {username}, \n\nYour verification code is: {otp}\n\nThanks for signing up with hunchØ.clothing, happy shopping"
+        )
+        if phone_number:
+            enqueue_sms(phone_number, f"Your verification code for hunchØ.clothing is: {otp}")
         
         # Add New User to the database
         try:
@@ -70,35 +74,6 @@ class RegisterResource(Resource):
             print(f"Error occurred: {e}")
             return {"message": "User registration failed"}, 500
         
-        # Send OTP to user's email and also print in the console for easy shit
-        msg = Message(
-            subject="Verification code for hunchØ.clothing.",
-            recipients=[email],
-            body=f"Good day {username}, \n\nYour verification code is: {otp}\n\nThanks for signing up with hunchØ.clothing, happy shopping"
-        )
-        try:
-            mail.send(msg)
-        except UnicodeEncodeError as e:
-            # Most likely caused by non-ASCII characters in MAIL_USERNAME or MAIL_PASSWORD
-            print(f"Email send failed due to non-ASCII credentials: {e}")
-            return {
-                "message": (
-                    "Failed to send verification email: non-ASCII characters detected in mail credentials. "
-                    "Ensure MAIL_USERNAME and MAIL_PASSWORD contain only ASCII characters (0-127)."
-                )
-            }, 500
-        except Exception as e:
-            # Generic email send failure
-            print(f"Error sending email: {e}")
-            return {"message": "Failed to send verification email."}, 500
-        
-        # Send OTP to user's phone number via SMS if phone number is provided
-        if phone_number:
-            message = f"Your verification code for hunchØ.clothing is: {otp}"
-            sms_sent = send_sms(phone_number, message)
-            if not sms_sent:
-                print(f"Failed to send SMS to {phone_number}")
-
         print(f"Verification OTP for {email}: {otp}")
         
         return{
@@ -170,9 +145,16 @@ class LoginResource(Resource):
             return {'message': 'User not verified. Please verify your account.'}, 403
         
         # check if password matches the hashed password
-        if not check_password_hash(user.password_hash,password):
-            return {'message': 'Invalid email or password'}, 401
-        
+        try:
+            if not user.check_password(password):
+                return {'message': 'Invalid email or password'}, 401
+
+            # upgrade hashes made with an older algorithm or cost
+            if password_hasher.needs_rehash(user.password_hash):
+                user.set_password(password)
+                db.session.commit()
+        except HasherBusy:
+            return BUSY_RESPONSE
         
         # create JWT tokens
         access_token = create_access_token(identity=str(user.user_id))
@@ -205,33 +187,15 @@ class ForgotPasswordResource(Resource):
         if not user:
             return {'message': 'User not found'}, 404
 
-        # generate and save OTP
+        # generate and save OTP, queueing the reset email with it
         otp = ''.join(random.choices(string.digits, k=6))
         user.reset_code = otp
-        db.session.commit()
-
-        # prepare and send email
-        # Send  reset OTP to user's email and also print in the console for easy shit
-        msg = Message(
+        enqueue_email(
             subject="Reset code for hunchØ.clothing.",
             recipients=[email],
             body=f"Good day {user.username}, \n\nYour reset code is: {otp}\n\nThanks for signing up with hunchØ.clothing, happy shopping"
         )
-        try:
-            mail.send(msg)
-        except UnicodeEncodeError as e:
-            # Most likely caused by non-ASCII characters in MAIL_USERNAME or MAIL_PASSWORD
-            print(f"Email send failed due to non-ASCII credentials: {e}")
-            return {
-                "message": (
-                    "Failed to send password reset email: non-ASCII characters detected in mail credentials. "
-                    "Ensure MAIL_USERNAME and MAIL_PASSWORD contain only ASCII characters (0-127)."
-                )
-            }, 500
-        except Exception as e:
-            # Generic email send failure
-            print(f"Error sending email: {e}")
-            return {"message": "Failed to send password reset email."}, 500
+        db.session.commit()
 
         
         print(f"Password reset OTP for {email}: {otp}")
@@ -265,7 +229,10 @@ class ResetPasswordResource(Resource):
                 return {'message': 'Invalid OTP code'}, 400
             
             # update password
-            user.password_hash = generate_password_hash(new_password)
+            try:
+                user.set_password(new_password)
+            except HasherBusy:
+                return BUSY_RESPONSE
             user.reset_code = None  # clear reset code
             db.session.commit()
             return {
@@ -2,38 +2,45 @@ from flask import request
 from flask_restful import Resource
 from app.models import db, Cart, CartItem, Product, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app import limiter
+from app.utils.rate_limit import CART_LIMIT
 from app.utils.validators import validate_json
+from app.utils.query_budget import query_budget
+from app.utils.cache import product_cache
+from app.utils.cart_view import cart_snapshot
+from app.utils.cart_ops import upsert_active_cart, upsert_cart_items, remove_cart_products, fold_operations
 from datetime import datetime
 
-limiter = Limiter(
-    key_func=get_remote_address
-)
+
+MAX_BATCH_OPERATIONS = 100
+BATCH_OPS = ("add", "set", "remove")
 
 class CartResource(Resource):
+    @query_budget(3)
     @jwt_required()
     @validate_json(["user_id"])
-    @limiter.limit("5 per minute")
+    @limiter.limit(CART_LIMIT)
     def get(self):
         """
         Get the current user's active cart
         """
         user_id = int(get_jwt_identity())
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
+        cart = cart_snapshot(user_id)
         
         if not cart:
-            # If no active cart, create one
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
+            # If no active cart, create one; the upsert lets two first visits race
+            # without tripping ux_carts_user_active
+            upsert_active_cart(user_id)
             db.session.commit()
+            cart = cart_snapshot(user_id)
 
-            return {"cart": cart.to_dict()}, 200
+        return {"cart": cart}, 200
 
 class AddToCartResource(Resource):
+    @query_budget(4)
     @jwt_required()
     @validate_json(["product_id", "quantity"])
-    @limiter.limit("5 per minute")
+    @limiter.limit(CART_LIMIT)
     def post(self):
         """"
         Add items to current user's cart or increase if it exists already
@@ -42,37 +49,29 @@ class AddToCartResource(Resource):
         data = request.get_json()
         
         product_id = data.get("product_id")
-        quantity = int(data.get("quantity", 1))
-        
         if not product_id:
             return {"message": "product_id is required"}, 400
+
+        try:
+            quantity = int(data.get("quantity", 1))
+        except (TypeError, ValueError):
+            return {"message": "Quantity must be an integer"}, 400
+
+        if quantity < 1:
+            return {"message": "Quantity must be at least 1"}, 400
         
-        product = Product.query.get(product_id)
+        # the cache only answers "does it exist"; the upsert reads the price from
+        # products, so a stale cached price never lands in price_at_time
+        product = product_cache.get_product(product_id)
         if not product:
             return {"message": "product not found"}, 404
         
-        cart = Cart.query.filter_by(user_id=user_id, is_active=True).first()
-        if not cart:
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
-            db.session.commit()
-        
-        # check if item is already in the cart
-        cart_item = CartItem.query.filter_by(cart_id=cart.cart_id,product_id=product_id).first()
-        if cart_item:
-            cart_item.quantity += quantity
-            cart_item.updated_at = datetime.utcnow()
-        else:
-            cart_item = CartItem(
-                cart_id=cart.cart_id,
-                user_id=user_id,
-                product_id=product_id,
-                quantity=quantity,
-                price_at_time=product.price,
-            )
-            db.session.add(cart_item)
+        # get-or-create the cart and add-or-increment the line with two upserts,
+        # so parallel adds can neither hit unique_user_product nor lose increments
+        cart_id = upsert_active_cart(user_id)
+        upsert_cart_items(cart_id, user_id, [(product["product_id"], quantity)])
         db.session.commit()
-        return {"message": "Item added to cart successfully", "cart": cart.to_dict()}, 201
+        return {"message": "Item added to cart successfully", "cart": cart_snapshot(user_id)}, 201
 
 class UpdateCartResource(Resource):
     @jwt_required()
@@ -109,7 +108,7 @@ class UpdateCartResource(Resource):
         cart_item.updated_at = datetime.utcnow()
         db.session.commit()
 
-        return {"message": "Cart item updated successfully", "cart": cart.to_dict()}, 200
+        return {"message": "Cart item updated successfully", "cart": cart_snapshot(user_id)}, 200
 
 class RemoveFromCartResource(Resource):
     @jwt_required()
@@ -132,7 +131,7 @@ class RemoveFromCartResource(Resource):
         db.session.delete(cart_item)
         db.session.commit()
         
-        return {"message": "Item removed from cart successfully", "cart": cart.to_dict()}, 200
+        return {"message": "Item removed from cart successfully", "cart": cart_snapshot(user_id)}, 200
 
 class ClearCartResource(Resource):
     @jwt_required()
@@ -151,4 +150,63 @@ class ClearCartResource(Resource):
         CartItem.query.filter_by(cart_id=cart.cart_id).delete()
         db.session.commit()
 
-        return {"message": "Cart cleared successfully"}, 200
\ No newline at end of file
+        return {"message": "Cart cleared successfully"}, 200
+
+class BatchCartResource(Resource):
+    @query_budget(6)
+    @jwt_required()
+    @validate_json(["operations"])
+    @limiter.limit("5 per minute")
+    def post(self):
+        """
+        Apply a list of add/set/remove operations to the user's active cart in
+        one transaction, e.g. merging a guest cart at login or adding a bundle.
+        Operations are applied in order; 'set' with quantity 0 removes the item.
+        """
+        user_id = int(get_jwt_identity())
+        operations = request.get_json().get("operations")
+
+        if not isinstance(operations, list) or not operations:
+            return {"message": "'operations' must be a non-empty list"}, 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return {"message": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}, 400
+
+        parsed = []
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get("op") not in BATCH_OPS:
+                return {"message": f"Operation {index}: 'op' must be one of {', '.join(BATCH_OPS)}"}, 400
+            op = operation["op"]
+            try:
+                product_id = int(operation.get("product_id"))
+                quantity = None if op == "remove" else int(operation.get("quantity", 1))
+            except (TypeError, ValueError):
+                return {"message": f"Operation {index}: 'product_id' and 'quantity' must be integers"}, 400
+            if quantity is not None and quantity < (0 if op == "set" else 1):
+                return {"message": f"Operation {index}: invalid quantity"}, 400
+            parsed.append((op, product_id, quantity))
+
+        net = fold_operations(parsed)
+
+        # one IN query to check every product being added or set exists
+        wanted = [product_id for product_id, (op, _) in net.items() if op != "remove"]
+        found = {
+            product_id for product_id, in
+            db.session.query(Product.product_id).filter(Product.product_id.in_(wanted))
+        } if wanted else set()
+        missing = [product_id for product_id in wanted if product_id not in found]
+        if missing:
+            return {"message": f"Products not found: {', '.join(map(str, missing))}"}, 404
+
+        cart_id = upsert_active_cart(user_id)
+        upsert_cart_items(cart_id, user_id, [
+            (product_id, quantity) for product_id, (op, quantity) in net.items() if op == "add"
+        ], increment=True)
+        upsert_cart_items(cart_id, user_id, [
+            (product_id, quantity) for product_id, (op, quantity) in net.items() if op == "set"
+        ], increment=False)
+        remove_cart_products(cart_id, [
+            product_id for product_id, (op, _) in net.items() if op == "remove"
+        ])
+        db.session.commit()
+
+        return {"message": "Cart updated successfully", "cart": cart_snapshot(user_id)}, 200
@@ -1,16 +1,18 @@
 from flask_restful import Resource
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import selectinload
 from app.models import db, Order, OrderItem, Product
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app import limiter
 from app.utils.validators import validate_json
+from app.utils.query_budget import query_budget
+from app.utils.stock import reserve_stock, InsufficientStock
+from app.utils.idempotency import idempotent
+from app.utils.money import to_pesewas, from_pesewas, total_pesewas
 
-limiter = Limiter(
-    key_func=get_remote_address
-)
 
 class OrderListResource(Resource):
+    @query_budget(2)
     @jwt_required()
     @validate_json(["user_id"])
     @limiter.limit("5 per minute")
@@ -19,12 +21,14 @@ class OrderListResource(Resource):
         Get all orders firm current user
         """
         user_id = int(get_jwt_identity())
-        orders = Order.query.filter_by(user_id=user_id).all()
+        # load every order's items in one extra query instead of one per order
+        orders = Order.query.options(selectinload(Order.items)).filter_by(user_id=user_id).all()
         return{'orders': [o.to_dict() for o in orders]}, 200
     
     @jwt_required()
     @validate_json(["items"])
     @limiter.limit("5 per minute")
+    @idempotent()
     def post(self):
         """
         Create a new order from the current user's cart(Checkout)
@@ -40,9 +44,8 @@ class OrderListResource(Resource):
         if not isinstance(items, list):
             return {"message": "'items' must be a list"}, 400
 
-        order_items = []
-        total_amount = 0.0
-
+        # validate every line before touching the database
+        lines = []
         for item in items:
             if not isinstance(item, dict):
                 return {"message": "Each item must be an object with 'product_id' and optional 'quantity'"}, 400
@@ -51,9 +54,10 @@ class OrderListResource(Resource):
             if product_id is None:
                 return {"message": "Each item must include 'product_id'"}, 400
 
-            product = Product.query.get(product_id)
-            if not product:
-                return {"message": f"Product with ID {product_id} not found"}, 404
+            try:
+                product_id = int(product_id)
+            except (TypeError, ValueError):
+                return {"message": "Item 'product_id' must be an integer"}, 400
 
             try:
                 quantity = int(item.get("quantity", 1))
@@ -63,29 +67,51 @@ class OrderListResource(Resource):
             if quantity < 1:
                 return {"message": "Item 'quantity' must be at least 1"}, 400
 
-            price = float(product.price)
-            total_amount += price * quantity
-            order_items.append({
-                "product_id": product.product_id,
+            lines.append((product_id, quantity))
+
+        # resolve all products in a single IN query
+        product_ids = {product_id for product_id, _ in lines}
+        products = {
+            p.product_id: p
+            for p in Product.query.filter(Product.product_id.in_(product_ids))
+        }
+
+        missing = [product_id for product_id, _ in lines if product_id not in products]
+        if missing:
+            return {"message": f"Product with ID {missing[0]} not found"}, 404
+
+        # all money math is in integer pesewas
+        prices = [to_pesewas(products[product_id].price) for product_id, _ in lines]
+        quantities = [quantity for _, quantity in lines]
+        order_items = [
+            {
+                "product_id": product_id,
                 "quantity": quantity,
-                "price": price
-            })
+                "price": from_pesewas(price)
+            }
+            for (product_id, quantity), price in zip(lines, prices)
+        ]
+
         new_order = Order(
             user_id=user_id,
-            total_amount=total_amount,
+            total_amount=from_pesewas(total_pesewas(prices, quantities)),
             # status='Pending'
         )
         db.session.add(new_order)
         db.session.flush()  # to get order_id
-        
+
+        # insert every line item with one multi-row INSERT
         for oi in order_items:
-            new_item = OrderItem(
-                order_id=new_order.order_id,
-                product_id=oi['product_id'],
-                quantity=oi['quantity'],
-                price=oi['price']
-            )
-            db.session.add(new_item)
+            oi["order_id"] = new_order.order_id
+        if order_items:
+            db.session.execute(OrderItem.__table__.insert().values(order_items))
+
+        # hold the stock in the same transaction; nothing is written if any line is short
+        try:
+            reserve_stock(new_order.order_id, lines)
+        except InsufficientStock as e:
+            db.session.rollback()
+            return {"message": str(e), "product_id": e.product_id}, 409
         db.session.commit()
         return{
             "message": "Order created successfully",
@@ -93,6 +119,7 @@ class OrderListResource(Resource):
         }, 201
 
 class OrderDetailResource(Resource):
+    @query_budget(2)
     @jwt_required()
     @validate_json(["order_id"])
     @limiter.limit("5 per minute")
@@ -101,7 +128,7 @@ class OrderDetailResource(Resource):
     Get details of a specific order
         """
         user_id = int(get_jwt_identity())
-        order = Order.query.filter_by(order_id=order_id, user_id=user_id).first()
+        order = Order.query.options(selectinload(Order.items)).filter_by(order_id=order_id, user_id=user_id).first()
         if not order:
             return {"message": "Order not found"}, 404
         return {"order": order.to_dict()}, 200
@@ -4,20 +4,19 @@ from flask import request
 from flask_restful import Resource
 from app.models import db, Order, Payment
 from app.utils.validators import validate_json 
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from dotenv import load_dotenv
+from app.utils.payment_events import verify_signature, record_event, mark_payments_successful
+from app.utils.http_client import http_client
+from app.utils.idempotency import idempotent
+from app.utils.money import to_pesewas
+from app import limiter
 
-load_dotenv()
 PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
 PAYSTACK_BASE_URL = os.getenv('PAYSTACK_BASE_URL', "https://api.paystack.co")
-limiter = Limiter(
-    key_func=get_remote_address
-)
 
 class InitializePaymentResource(Resource):
     @validate_json(['order_id', 'email'])
     @limiter.limit("5 per minute")
+    @idempotent()
     def post(self):
         data = request.get_json()
         order_id = data.get('order_id')
@@ -29,11 +28,12 @@ class InitializePaymentResource(Resource):
         order = Order.query.get(order_id)
         if not order:
             return{"message": "Order not found"}, 404
+        if order.status == 'expired':
+            return{"message": "Order has expired, please place it again"}, 400
         
-        amount_pesewas = float(order.total_amount) * 100 # Paystack expects amount in kobo/pesewas
         payload = {
             "email": email,
-            "amount": float(amount_pesewas),
+            "amount": to_pesewas(order.total_amount), # Paystack expects an integer amount in pesewas
             "currency": "GHS",
         }
         
@@ -42,8 +42,12 @@ class InitializePaymentResource(Resource):
             "Content-Type": "application/json"
         }
         
-        response = requests.post(f"{PAYSTACK_BASE_URL}/transaction/initialize", json=payload, headers=headers)
-        data = response.json()
+        try:
+            response = http_client.post(f"{PAYSTACK_BASE_URL}/transaction/initialize", service="paystack", json=payload, headers=headers)
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Paystack initialize failed for order {order_id}: {e}")
+            return {"message": "Payment provider unavailable, please try again"}, 502
         
         if response.status_code == 200 and data.get("status"):
             reference = data["data"]["reference"]
@@ -70,29 +74,35 @@ class VerifyPaymentResource(Resource):
         headers={
             "Authorization": f"Bearer {PAYSTACK_SECRET_KEY}"
         }
-        response = requests.get(f"{PAYSTACK_BASE_URL}/transaction/verify/{reference}", headers=headers)
-        data = response.json()
+        try:
+            response = http_client.get(f"{PAYSTACK_BASE_URL}/transaction/verify/{reference}", service="paystack", headers=headers)
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Paystack verify failed for {reference}: {e}")
+            return {"message": "Payment provider unavailable, please try again"}, 502
         
         if response.status_code == 200 and data.get("data")["status"]== "success":
             payment = Payment.query.filter_by(reference=reference).first()
             if payment:
-                payment.status = "successful"
+                mark_payments_successful([reference])
                 db.session.commit()
                 return {"message": "Payment verified successfully", "data":data["data"]},200
         return {"message": "Payment verification failed", "error": data}, 400
     
 class PaystackWebhookResource(Resource):
     @validate_json(['event'])
-    @limiter.limit("5 per minute")
     def post(self):
+        """
+        Verify the Paystack signature and store the event in the inbox.
+        Processing happens in batches in the webhook consumer.
+        """
+        signature = request.headers.get('x-paystack-signature')
+        if not verify_signature(request.get_data(), signature, PAYSTACK_SECRET_KEY):
+            return {"message": "Invalid signature"}, 401
+
         event = request.get_json()
-        if not event:
+        if not event or not event.get("event"):
             return {"message": "Invalid payload"}, 400
-        
-        if event["event"] == "charge.success":
-            reference = event["data"]["reference"]
-            payment = Payment.query.filter_by(reference=reference).first()
-            if payment:
-                payment.status = "Successful"
-                db.session.commit()
-        return {"message": "Webhook received"}, 200
\ No newline at end of file
+
+        record_event(event, request.get_data())
+        return {"message": "Webhook received"}, 200
@@ -1,14 +1,20 @@
-from flask import request
+from flask import request, Response, stream_with_context
 from flask_restful import Resource
+from datetime import datetime
+from sqlalchemy import func, tuple_
 from app.models import db, Product, Category
 from app.utils.validators import validate_json
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit
+from app.utils.search import search_products
+from app.utils.cache import product_cache
+from app.utils.serialization import dumps
+from app.utils.http_cache import make_etag, cache_headers, is_not_modified, not_modified
+from app import limiter
+from app.utils.rate_limit import CATALOG_READ_LIMIT
 from flask_jwt_extended import jwt_required
 
-limiter = Limiter(
-    key_func=get_remote_address
-)
+
+STREAM_BATCH_SIZE = 500
 
 # This is an admin only resource
 
@@ -16,10 +22,11 @@ limiter = Limiter(
 class ProductListResource(Resource):
     @jwt_required(optional=True)
     @validate_json(['categories_id'])
-    @limiter.limit("5 per minute")
+    @limiter.limit(CATALOG_READ_LIMIT)
     def get(self):
         """
-        Get all products with optional filtering
+        Get products with optional filtering, one keyset page at a time.
+        Pass ?stream=true to stream the whole filtered catalog instead.
         """
         categories_id = request.args.get('categories_id')
         size = request.args.get('size')
@@ -37,8 +44,50 @@ class ProductListResource(Resource):
         if color:
             query = query.filter(Product.color.ilike(f"%{color}%"))
 
-        products = query.all()
-        return {'products': [p.to_dict() for p in products]}, 200
+        # Validators for the whole filtered set; answer 304 before serializing anything
+        last_modified, count = query.with_entities(
+            func.max(Product.updated_at), func.count(Product.product_id)
+        ).one()
+        etag = make_etag(last_modified, count, request.query_string.decode())
+        headers = cache_headers(etag, last_modified)
+        if is_not_modified(etag, last_modified):
+            return not_modified(headers)
+
+        # newest first, product_id breaks ties between equal timestamps
+        query = query.order_by(Product.created_at.desc(), Product.product_id.desc())
+
+        if request.args.get('stream', 'false').lower() == 'true':
+            response = stream_products(query)
+            response.headers.update(headers)
+            return response
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError:
+            return {'message': "'limit' must be a positive integer"}, 400
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                created_at, product_id = decode_cursor(cursor)
+            except ValueError:
+                return {'message': 'Invalid cursor'}, 400
+            query = query.filter(
+                tuple_(Product.created_at, Product.product_id) < tuple_(created_at, product_id)
+            )
+
+        # fetch one extra row to know whether another page exists
+        products = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            last = products[-1]
+            next_cursor = encode_cursor(last.created_at, last.product_id)
+
+        return {
+            'products': [p.to_dict() for p in products],
+            'next_cursor': next_cursor
+        }, 200, headers
 
     @jwt_required()
     @validate_json(['name', 'price'])
@@ -75,18 +124,59 @@ class ProductListResource(Resource):
         db.session.commit()
         return {'message': 'Product created', 'product': new_product.to_dict()}, 201
 
+def stream_products(query):
+    """
+    Stream the products of a query as a JSON document, reading rows from a
+    server-side cursor in batches so the full result is never held in memory.
+    """
+    def generate():
+        yield b'{"products": ['
+        for index, product in enumerate(query.yield_per(STREAM_BATCH_SIZE)):
+            if index:
+                yield b','
+            yield dumps(product.to_dict())
+        yield b']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+class ProductSearchResource(Resource):
+    @jwt_required(optional=True)
+    @limiter.limit(CATALOG_READ_LIMIT)
+    def get(self):
+        """
+        Full-text product search over name, brand and description, ranked by relevance
+        """
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return {'message': "'q' is required"}, 400
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError:
+            return {'message': "'limit' must be a positive integer"}, 400
+
+        products = search_products(q, limit)
+        return {'query': q, 'products': [p.to_dict() for p in products]}, 200
+
 class ProductDetailResource(Resource):
     @jwt_required(optional=True)
     @validate_json(['product_id'])
-    @limiter.limit("5 per minute")
+    @limiter.limit(CATALOG_READ_LIMIT)
     def get(self, product_id):
         """
         Get a specific product
         """
-        product = Product.query.get(product_id)
+        product = product_cache.get_product(product_id)
         if not product:
             return {'message': "Product not found"}, 404
-        return product.to_dict(), 200
+
+        updated_at = product.get("updated_at")
+        last_modified = datetime.fromisoformat(updated_at) if updated_at else None
+        etag = make_etag(product["product_id"], updated_at)
+        headers = cache_headers(etag, last_modified)
+        if is_not_modified(etag, last_modified):
+            return not_modified(headers)
+        return product, 200, headers
 
     @jwt_required()
 
@@ -120,4 +210,12 @@ class ProductDetailResource(Resource):
 
         db.session.delete(product)
         db.session.commit()
-        return {"message": "Product deleted successfully"}, 200
\ No newline at end of file
+        return {"message": "Product deleted successfully"}, 200
+
+class ProductCacheStatsResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Product cache hit/miss counters, used to size the cache
+        """
+        return product_cache.stats(), 200
@@ -2,13 +2,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask import request
 from flask_restful import Resource
 from app.models import db, User
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app import limiter
 from app.utils.validators import validate_json
 
-limiter = Limiter(
-    key_func=get_remote_address
-)
 
 # User Profile Resource (GET, UPDATE, DELETE)
 class UserProfileResource(Resource):
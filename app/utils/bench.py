@@ -0,0 +1,137 @@
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+from app.models import db, Product
+
+bench_cli = AppGroup('bench', help='Microbenchmarks for hot paths.')
+
+BENCH_WORDS = ['shirt', 'hoodie', 'cap', 'jeans', 'sneaker', 'jacket', 'tee', 'cargo']
+BENCH_BRANDS = ['huncho', 'nike', 'adidas', 'puma', 'zara']
+# one row in BENCH_MATCH_EVERY names a real garment, the rest are md5 noise, so a
+# term matches a small slice of the catalog like it would in production
+BENCH_MATCH_EVERY = 100
+
+
+def timed(func, repeat):
+    """Best-of-`repeat` wall time of func() in milliseconds, to cut scheduler noise."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def insert_bench_products(start, stop):
+    # the request statement_timeout would cancel the bulk insert at 1M rows
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    # mod() rather than %, which pg8000 takes for a placeholder
+    db.session.execute(text("""
+        INSERT INTO products.products_table (name, description, price, stock, brand, size, color, created_at, updated_at)
+        SELECT
+            'item ' || substr(md5(i::text), 1, 8) || CASE WHEN mod(i, :match_every) = 0
+                THEN ' ' || (CAST(:words AS text[]))[1 + mod(i / :match_every, :word_count)] ELSE '' END,
+            'synthetic product ' || md5(i::text),
+            10 + mod(i, 90), 10, (CAST(:brands AS text[]))[1 + mod(i, :brand_count)], 'M', 'black',
+            now() - make_interval(secs => i), now()
+        FROM generate_series(CAST(:start AS integer), CAST(:stop AS integer)) AS i
+    """), {
+        "start": start, "stop": stop, "match_every": BENCH_MATCH_EVERY,
+        "words": BENCH_WORDS, "word_count": len(BENCH_WORDS),
+        "brands": BENCH_BRANDS, "brand_count": len(BENCH_BRANDS),
+    })
+    db.session.execute(text("ANALYZE products.products_table"))
+
+
+@bench_cli.command('search')
+@click.option('--rows', multiple=True, type=int, default=(10_000, 100_000, 1_000_000), show_default=True)
+@click.option('--term', default='hoodie', show_default=True)
+@click.option('--repeat', default=10, show_default=True)
+def search_bench(rows, term, repeat):
+    """
+    Compare the unindexed ilike scan /products used to do with the trigram
+    indexed ilike and search_products, on synthetic catalogs of each size.
+    The catalog grows from one size to the next in a single transaction that
+    is rolled back at the end; still, run it against a staging copy, not production.
+    """
+    from app.utils.search import search_products
+
+    ilike = Product.query.filter(Product.name.ilike(f"%{term}%")).order_by(Product.product_id.desc()).limit(20)
+    print(f"{'rows':>10} {'ilike seq scan':>16} {'ilike trigram':>15} {'search':>10}  (best of {repeat}, ms)")
+    inserted = 0
+    try:
+        for count in sorted(rows):
+            insert_bench_products(inserted + 1, count)
+            inserted = count
+            # what the filter cost before the trigram indexes existed
+            db.session.execute(text("SET LOCAL enable_indexscan = off"))
+            db.session.execute(text("SET LOCAL enable_bitmapscan = off"))
+            seq_ms = timed(lambda: ilike.all(), repeat)
+            db.session.execute(text("SET LOCAL enable_indexscan = on"))
+            db.session.execute(text("SET LOCAL enable_bitmapscan = on"))
+            trgm_ms = timed(lambda: ilike.all(), repeat)
+            search_ms = timed(lambda: search_products(term, 20), repeat)
+            print(f"{count:>10} {seq_ms:>16.2f} {trgm_ms:>15.2f} {search_ms:>10.2f}")
+    finally:
+        db.session.rollback()
+
+
+def legacy_product_dict(product):
+    """Product.to_dict as it was written by hand before serialize_product."""
+    return {
+        "product_id": product.product_id,
+        "name": product.name,
+        "description": product.description,
+        "price": float(product.price),
+        "stock": product.stock,
+        "brand": product.brand,
+        "size": product.size,
+        "color": product.color,
+        "image_url": product.image_url,
+        "category_id": product.categories_id,
+        "created_at": product.created_at.isoformat(),
+        "updated_at": product.updated_at.isoformat() if product.updated_at else None,
+    }
+
+
+@bench_cli.command('serialize')
+@click.option('--rows', default=10_000, show_default=True, help='Products per listing.')
+@click.option('--repeat', default=10, show_default=True)
+def serialize_bench(rows, repeat):
+    """
+    Compare the hand-written Product.to_dict + stdlib json.dumps (the old
+    response path) with serialize_product + orjson on an in-memory listing.
+    Needs no database.
+    """
+    from app.models import serialize_product
+    from app.utils.serialization import dumps
+
+    now = datetime.utcnow()
+    products = [
+        Product(
+            product_id=i, name=f"item {i} {BENCH_WORDS[i % len(BENCH_WORDS)]}", description=f"synthetic product {i}",
+            price=Decimal("10.00") + i % 90, stock=10, brand=BENCH_BRANDS[i % len(BENCH_BRANDS)], size="M",
+            color="black", image_url=f"https://cdn.example.com/{i}.jpg", categories_id=1 + i % 5,
+            created_at=now, updated_at=now,
+        )
+        for i in range(rows)
+    ]
+    assert [legacy_product_dict(p) for p in products[:10]] == [serialize_product(p) for p in products[:10]]
+
+    old_dicts = timed(lambda: [legacy_product_dict(p) for p in products], repeat)
+    new_dicts = timed(lambda: [serialize_product(p) for p in products], repeat)
+    payload = {"products": [serialize_product(p) for p in products]}
+    old_encode = timed(lambda: json.dumps(payload), repeat)
+    new_encode = timed(lambda: dumps(payload), repeat)
+    old_total = timed(lambda: json.dumps({"products": [legacy_product_dict(p) for p in products]}), repeat)
+    new_total = timed(lambda: dumps({"products": [serialize_product(p) for p in products]}), repeat)
+
+    print(f"{rows} products, best of {repeat}, ms")
+    print(f"{'':>10} {'to_dict':>10} {'encode':>10} {'total':>10}")
+    print(f"{'old':>10} {old_dicts:>10.2f} {old_encode:>10.2f} {old_total:>10.2f}")
+    print(f"{'new':>10} {new_dicts:>10.2f} {new_encode:>10.2f} {new_total:>10.2f}")
+    print(f"{'speedup':>10} {old_dicts / new_dicts:>9.1f}x {old_encode / new_encode:>9.1f}x {old_total / new_total:>9.1f}x")
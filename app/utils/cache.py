@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # redis is optional, only needed for PRODUCT_CACHE_BACKEND=redis
+    redis = None
+
+
+class LRUCacheBackend:
+    """
+    In-process LRU cache with a per-entry TTL.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DictRedis:
+    """
+    Minimal stand-in for a redis client (get/setex/delete) backed by a dict.
+    Expiry is ignored and nothing is shared between processes, so it is for
+    tests only; init_app never falls back to it.
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def setex(self, key, ttl, value):
+        self._data[key] = value
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+
+class RedisCacheBackend:
+    """
+    Shared cache backend for any redis-compatible client. Values are stored as JSON.
+    """
+
+    def __init__(self, client, ttl=300, prefix="product:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + str(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self.client.setex(self.prefix + str(key), self.ttl, json.dumps(value))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + str(key))
+
+
+class ProductCache:
+    """
+    Read-through cache of serialized products keyed by product_id.
+    Entries are invalidated after any commit that touched the product.
+    """
+
+    def __init__(self):
+        self.backend = LRUCacheBackend()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        from app.models import db
+
+        backend = app.config.get('PRODUCT_CACHE_BACKEND', 'memory')
+        ttl = int(app.config.get('PRODUCT_CACHE_TTL', 300))
+
+        if backend == 'redis':
+            # a per-worker fallback would only be invalidated in the worker that
+            # committed, so the others would serve stale prices; refuse to start
+            redis_url = app.config.get('REDIS_URL')
+            if not redis_url:
+                raise RuntimeError("PRODUCT_CACHE_BACKEND=redis requires REDIS_URL")
+            if redis is None:
+                raise RuntimeError("PRODUCT_CACHE_BACKEND=redis requires the redis package")
+            self.backend = RedisCacheBackend(redis.Redis.from_url(redis_url), ttl=ttl)
+        else:
+            self.backend = LRUCacheBackend(
+                maxsize=int(app.config.get('PRODUCT_CACHE_SIZE', 1024)),
+                ttl=ttl
+            )
+
+        self.register_session_events(db.session)
+
+    def register_session_events(self, session):
+        from sqlalchemy import event
+        from app.models import Product
+
+        @event.listens_for(session, 'after_flush')
+        def collect_changed_products(session, flush_context):
+            changed = session.info.setdefault('product_cache_invalidate', set())
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+                if isinstance(obj, Product) and obj.product_id is not None:
+                    changed.add(obj.product_id)
+
+        @event.listens_for(session, 'after_commit')
+        def invalidate_changed_products(session):
+            for product_id in session.info.pop('product_cache_invalidate', ()):
+                self.invalidate(product_id)
+
+        @event.listens_for(session, 'after_rollback')
+        def discard_changed_products(session):
+            session.info.pop('product_cache_invalidate', None)
+
+    def get_product(self, product_id):
+        """
+        Return the serialized product, loading it from the database on a miss.
+        Returns None if the product does not exist.
+        """
+        from app.models import Product
+
+        product_id = int(product_id)
+        cached = self.backend.get(product_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        product = Product.query.get(product_id)
+        if not product:
+            return None
+        data = product.to_dict()
+        self.backend.set(product_id, data)
+        return data
+
+    def invalidate_on_commit(self, session, product_ids):
+        """
+        Evict products changed by bulk UPDATEs, which never show up in session.dirty.
+        """
+        session.info.setdefault('product_cache_invalidate', set()).update(product_ids)
+
+    def invalidate(self, product_id):
+        self.backend.delete(product_id)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+product_cache = ProductCache()
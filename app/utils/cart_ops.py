@@ -0,0 +1,97 @@
+from datetime import datetime
+from sqlalchemy import case, literal, select, union_all
+from app.models import db, Cart, CartItem, Product
+from app.utils.sql import upsert_insert
+
+
+def upsert_active_cart(user_id):
+    """
+    Return the user's active cart_id, creating the cart if needed, in one
+    statement. Relies on the partial unique index on carts(user_id) WHERE is_active.
+    """
+    carts = Cart.__table__
+    now = datetime.utcnow()
+    stmt = upsert_insert(carts).values(user_id=user_id, is_active=True, created_at=now, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[carts.c.user_id],
+        index_where=carts.c.is_active,
+        set_={"updated_at": stmt.excluded.updated_at},
+    ).returning(carts.c.cart_id)
+    return db.session.execute(stmt).scalar_one()
+
+
+def upsert_cart_items(cart_id, user_id, lines, increment=True):
+    """
+    Write several (product_id, quantity) lines into the cart with one
+    multi-row upsert. price_at_time is read from products in the same
+    statement (INSERT ... SELECT), never from a cached copy; products that
+    no longer exist are skipped. With increment=True existing lines are
+    increased by `quantity`, otherwise their quantity is replaced. A line
+    left over from an older cart is moved into this one with the new quantity.
+    """
+    if not lines:
+        return
+    items = CartItem.__table__
+    products = Product.__table__
+    now = datetime.utcnow()
+    # one SELECT per line, each with a WHERE, so SQLite can also parse the ON CONFLICT
+    rows = [
+        select(
+            literal(cart_id), literal(user_id), products.c.product_id, literal(quantity),
+            products.c.price, literal(now), literal(now),
+        ).where(products.c.product_id == product_id)
+        for product_id, quantity in lines
+    ]
+    stmt = upsert_insert(items).from_select(
+        ["cart_id", "user_id", "product_id", "quantity", "price_at_time", "created_at", "updated_at"],
+        rows[0] if len(rows) == 1 else union_all(*rows),
+    )
+    excluded = stmt.excluded
+    if increment:
+        new_quantity = case(
+            (items.c.cart_id == excluded.cart_id, items.c.quantity + excluded.quantity),
+            else_=excluded.quantity,
+        )
+    else:
+        new_quantity = excluded.quantity
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[items.c.user_id, items.c.product_id],
+        set_={
+            "quantity": new_quantity,
+            "cart_id": excluded.cart_id,
+            "updated_at": excluded.updated_at,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def remove_cart_products(cart_id, product_ids):
+    """Delete the given products from the cart in one statement."""
+    if not product_ids:
+        return
+    db.session.execute(
+        CartItem.__table__.delete().where(
+            CartItem.cart_id == cart_id, CartItem.product_id.in_(product_ids)
+        )
+    )
+
+
+def fold_operations(operations):
+    """
+    Reduce an ordered list of (op, product_id, quantity) into one net change
+    per product: ('add', delta), ('set', quantity) or ('remove', None).
+    """
+    net = {}
+    for op, product_id, quantity in operations:
+        current = net.get(product_id)
+        if op == 'remove' or (op == 'set' and quantity == 0):
+            net[product_id] = ('remove', None)
+        elif op == 'set':
+            net[product_id] = ('set', quantity)
+        elif current is None:
+            net[product_id] = ('add', quantity)
+        elif current[0] == 'remove':
+            net[product_id] = ('set', quantity)
+        else:
+            net[product_id] = (current[0], current[1] + quantity)
+    return net
@@ -0,0 +1,67 @@
+from sqlalchemy import func, select
+from app.models import db, Cart, CartItem, Product
+from app.utils.money import to_pesewas, pesewas_to_json
+
+
+def cart_snapshot(user_id):
+    """
+    Load the user's active cart, its items joined with the current product
+    name/price/image and the cart total in a single query.
+    The total is summed in SQL as Numeric via a window over the cart's rows.
+    Returns None if the user has no active cart.
+    """
+    line_total = CartItem.price_at_time * CartItem.quantity
+    stmt = (
+        select(
+            Cart.cart_id,
+            Cart.user_id,
+            Cart.is_active,
+            Cart.created_at,
+            Cart.updated_at,
+            CartItem.cart_item_id,
+            CartItem.product_id,
+            CartItem.quantity,
+            CartItem.price_at_time,
+            CartItem.created_at.label("item_created_at"),
+            CartItem.updated_at.label("item_updated_at"),
+            Product.name.label("product_name"),
+            Product.price.label("product_price"),
+            Product.image_url,
+            func.coalesce(func.sum(line_total).over(), 0).label("total"),
+        )
+        .select_from(Cart)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.cart_id)
+        .outerjoin(Product, Product.product_id == CartItem.product_id)
+        .where(Cart.user_id == user_id, Cart.is_active == True)
+        .order_by(CartItem.cart_item_id)
+    )
+    rows = db.session.execute(stmt).all()
+    if not rows:
+        return None
+
+    head = rows[0]
+    items = [
+        {
+            "cart_item_id": row.cart_item_id,
+            "cart_id": row.cart_id,
+            "product_id": row.product_id,
+            "quantity": row.quantity,
+            "price_at_time": float(row.price_at_time),
+            "product_name": row.product_name,
+            "product_price": float(row.product_price) if row.product_price is not None else None,
+            "image_url": row.image_url,
+            "created_at": row.item_created_at.isoformat() if row.item_created_at else None,
+            "updated_at": row.item_updated_at.isoformat() if row.item_updated_at else None,
+        }
+        for row in rows
+        if row.cart_item_id is not None
+    ]
+    return {
+        "cart_id": head.cart_id,
+        "user_id": head.user_id,
+        "is_active": head.is_active,
+        "created_at": head.created_at.isoformat() if head.created_at else None,
+        "updated_at": head.updated_at.isoformat() if head.updated_at else None,
+        "items": items,
+        "total": pesewas_to_json(to_pesewas(head.total)),
+    }
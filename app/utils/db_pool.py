@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Sizing recipe
+# -------------
+# Every gunicorn worker process owns its own pool, so the most connections the
+# app can open is:
+#
+#     workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+#
+# Keep that under postgres max_connections minus the headroom needed for
+# migrations, the notification worker and admin sessions. With sync workers
+# a process serves one request at a time, so DB_POOL_SIZE=2, DB_MAX_OVERFLOW=0
+# is enough; with gthread use DB_POOL_SIZE = threads per worker. During a
+# rolling deploy old and new workers overlap, so budget for twice the total.
+# If pool_wait_seconds_max grows under load, add connections; if checked_out
+# stays well under pool_size, shrink the pool.
+#
+# gunicorn.conf.py applies this by default: one gthread worker per available
+# CPU, DB_POOL_SIZE = threads, DB_MAX_OVERFLOW = 0, and it warns at startup
+# when workers * (pool + overflow) exceeds DB_CONNECTION_BUDGET.
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_seconds = 0.0
+        self.connect_seconds_max = 0.0
+        # callables(kind, seconds) with kind 'wait' or 'connect', e.g. the Prometheus exporter
+        self.observers = []
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, timed_out=False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+        for observer in self.observers:
+            observer('wait', seconds)
+
+    def observe_connect(self, seconds):
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds += seconds
+            self.connect_seconds_max = max(self.connect_seconds_max, seconds)
+        for observer in self.observers:
+            observer('connect', seconds)
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a free slot,
+    and separately how long opening new connections took.
+    """
+
+    _local = threading.local()
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            elapsed = time.perf_counter() - started
+            self._local.connect_seconds = getattr(self._local, 'connect_seconds', 0.0) + elapsed
+            pool_wait_stats.observe_connect(elapsed)
+
+    def _do_get(self):
+        self._local.connect_seconds = 0.0
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except Exception:
+            timed_out = True
+            raise
+        finally:
+            # a checkout that had to open a connection spent that time connecting, not queueing
+            waited = time.perf_counter() - started - self._local.connect_seconds
+            pool_wait_stats.observe(max(waited, 0.0), timed_out)
+
+
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* config values.
+    SQLite (used for local test runs) keeps SQLAlchemy's defaults.
+    """
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def init_app(app, db):
+    """
+    Apply the statement timeout to every new postgres connection.
+    """
+    timeout_ms = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    if not timeout_ms:
+        return
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {int(timeout_ms)}")
+        cursor.close()
+        # SET is transactional; commit so the pool's reset-on-return rollback keeps it
+        dbapi_connection.commit()
+
+
+def pool_stats(engine):
+    """
+    Pool usage for this worker process.
+    """
+    pool = engine.pool
+    stats = {"pid": os.getpid(), "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    stats.update({
+        "pool_waits": pool_wait_stats.waits,
+        "pool_wait_seconds_total": round(pool_wait_stats.wait_seconds, 6),
+        "pool_wait_seconds_max": round(pool_wait_stats.wait_seconds_max, 6),
+        "pool_timeouts": pool_wait_stats.timeouts,
+        "pool_connects": pool_wait_stats.connects,
+        "pool_connect_seconds_total": round(pool_wait_stats.connect_seconds, 6),
+        "pool_connect_seconds_max": round(pool_wait_stats.connect_seconds_max, 6),
+    })
+    return stats
@@ -0,0 +1,51 @@
+import hashlib
+from datetime import timezone
+from flask import request, Response, current_app
+from werkzeug.http import http_date
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag value from the given parts.
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _as_utc(value):
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value else None
+
+
+def cache_headers(etag, last_modified=None):
+    """
+    Validator and Cache-Control headers for a cacheable catalog response.
+    """
+    max_age = current_app.config.get('CATALOG_CACHE_MAX_AGE', 60)
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={max_age}, stale-while-revalidate={max_age * 5}',
+    }
+    if last_modified:
+        headers['Last-Modified'] = http_date(_as_utc(last_modified))
+    return headers
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    Evaluate If-None-Match / If-Modified-Since for the current request.
+    If-None-Match takes precedence when both are sent.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified and request.if_modified_since:
+        return _as_utc(last_modified) <= request.if_modified_since
+    return False
+
+
+def not_modified(headers):
+    """
+    Empty 304 response carrying the same validators as a full response.
+    """
+    response = Response(status=304)
+    response.headers.update(headers)
+    return response
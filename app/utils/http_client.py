@@ -0,0 +1,211 @@
+import random
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RETRY_STATUSES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without calling upstream while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for
+    `cooldown` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram (seconds) with fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                running += count
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+            return {"buckets": cumulative, "sum": round(self.total, 6), "count": self.count}
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client: one keep-alive connection pool per host,
+    default timeouts, retry with jittered backoff, a circuit breaker per host
+    and a latency histogram per service.
+    """
+
+    def __init__(self):
+        self.connect_timeout = 3.05
+        self.read_timeout = 10
+        self.pool_maxsize = 10
+        self.max_retries = 2
+        self.backoff = 0.2
+        self.breaker_threshold = 5
+        self.breaker_cooldown = 30
+        self._sessions = {}
+        self._breakers = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        # callables(service, seconds) called for every attempt, e.g. the Prometheus exporter
+        self.observers = []
+
+    def init_app(self, app):
+        self.connect_timeout = float(app.config.get('HTTP_CONNECT_TIMEOUT', self.connect_timeout))
+        self.read_timeout = float(app.config.get('HTTP_READ_TIMEOUT', self.read_timeout))
+        self.pool_maxsize = int(app.config.get('HTTP_POOL_MAXSIZE', self.pool_maxsize))
+        self.max_retries = int(app.config.get('HTTP_MAX_RETRIES', self.max_retries))
+        self.breaker_threshold = int(app.config.get('HTTP_BREAKER_THRESHOLD', self.breaker_threshold))
+        self.breaker_cooldown = float(app.config.get('HTTP_BREAKER_COOLDOWN', self.breaker_cooldown))
+        self.reset()
+
+    def reset(self):
+        """
+        Drop all pooled connections, e.g. in a freshly forked worker.
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._breakers = {}
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # pool_block caps concurrent connections to one host at pool_maxsize
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return session, self._breakers[host]
+
+    def _histogram(self, service):
+        with self._lock:
+            histogram = self._histograms.get(service)
+            if histogram is None:
+                histogram = self._histograms[service] = LatencyHistogram()
+            return histogram
+
+    def _observe(self, service, histogram, seconds):
+        histogram.observe(seconds)
+        for observer in self.observers:
+            observer(service, seconds)
+
+    def request(self, method, url, service=None, **kwargs):
+        """
+        Send a request through the pooled session for the url's host.
+        Non-idempotent methods are only retried when the connection was never
+        established, so a POST is never sent twice.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        service = service or host
+        session, breaker = self._session(host)
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        histogram = self._histogram(service)
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"circuit open for {host}")
+
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._observe(service, histogram, time.perf_counter() - started)
+                breaker.record_failure()
+                retryable = isinstance(e, requests.exceptions.ConnectTimeout) or (
+                    isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                    and method in IDEMPOTENT_METHODS
+                )
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            else:
+                self._observe(service, histogram, time.perf_counter() - started)
+                if response.status_code in RETRY_STATUSES:
+                    breaker.record_failure()
+                    if method not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+                        return response
+                else:
+                    breaker.record_success()
+                    return response
+
+            attempt += 1
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            histograms = dict(self._histograms)
+            breakers = dict(self._breakers)
+        return {
+            "latency": {service: h.snapshot() for service, h in histograms.items()},
+            "circuits": {host: b.state for host, b in breakers.items()},
+        }
+
+
+http_client = HttpClient()
@@ -0,0 +1,158 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request
+from flask.cli import AppGroup, with_appcontext
+from flask_jwt_extended import get_jwt_identity
+from flask_limiter.util import get_remote_address
+from sqlalchemy import or_
+from app.models import db, IdempotencyKey
+from app.utils.sql import upsert_insert
+
+idempotency_cli = AppGroup('idempotency', help='Idempotency key storage.')
+
+STALE_IN_PROGRESS = timedelta(minutes=5)
+
+
+def request_fingerprint():
+    body = request.get_json(silent=True)
+    raw = json.dumps([request.method, request.path, body], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def request_scope():
+    """
+    Keys are unique per endpoint and caller: the user for authenticated
+    calls. Anonymous calls (payment initialization) are scoped by the order
+    in the body, or the client address, so two clients reusing a key never
+    see each other's responses.
+    """
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        identity = None
+    if identity:
+        return f"{request.endpoint}:user:{identity}"
+
+    body = request.get_json(silent=True)
+    order_id = body.get('order_id') if isinstance(body, dict) else None
+    if order_id is not None:
+        return f"{request.endpoint}:order:{order_id}"[:255]
+    return f"{request.endpoint}:ip:{get_remote_address()}"
+
+
+def claim_key(scope, key, fingerprint):
+    """
+    Try to take ownership of (scope, key). Expired rows and rows left
+    in progress by a crashed request can be taken over.
+    Returns None when claimed, otherwise the existing record.
+    """
+    table = IdempotencyKey.__table__
+    now = datetime.utcnow()
+    ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', 24))
+    stmt = upsert_insert(table).values(
+        scope=scope,
+        key=key,
+        fingerprint=fingerprint,
+        status='in_progress',
+        created_at=now,
+        expires_at=now + ttl,
+    )
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.key],
+        set_={
+            "fingerprint": excluded.fingerprint,
+            "status": excluded.status,
+            "response_code": None,
+            "response_body": None,
+            "created_at": excluded.created_at,
+            "expires_at": excluded.expires_at,
+        },
+        where=or_(
+            table.c.expires_at < now,
+            (table.c.status == 'in_progress') & (table.c.created_at < now - STALE_IN_PROGRESS),
+        ),
+    ).returning(table.c.idempotency_key_id)
+    claimed = db.session.execute(stmt).first()
+    # commit the claim on its own so a concurrent retry sees it straight away
+    db.session.commit()
+    if claimed:
+        return None
+    return IdempotencyKey.query.filter_by(scope=scope, key=key).first()
+
+
+def release_key(scope, key):
+    IdempotencyKey.query.filter_by(scope=scope, key=key).delete()
+    db.session.commit()
+
+
+def complete_key(scope, key, body, code):
+    IdempotencyKey.query.filter_by(scope=scope, key=key).update(
+        {"status": "completed", "response_code": code, "response_body": body}
+    )
+    db.session.commit()
+
+
+def unpack_result(result):
+    """(body, status) of a resource return value, or (None, None) for Response objects."""
+    if isinstance(result, tuple):
+        return result[0], result[1] if len(result) > 1 else 200
+    if isinstance(result, (dict, list)):
+        return result, 200
+    return None, None
+
+
+def idempotent(key_func=None):
+    """
+    Make a resource method safe to retry. The first request with a given
+    Idempotency-Key (or the key returned by `key_func`) runs normally and
+    its response is stored; replays get the stored response without running
+    the handler again. Requests without a key are not affected.
+    5xx responses and exceptions are not stored so the client can retry.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = key_func() if key_func else request.headers.get('Idempotency-Key')
+            if not key:
+                return func(*args, **kwargs)
+            if len(key) > 255:
+                return {"message": "Idempotency-Key must be at most 255 characters"}, 400
+
+            scope = request_scope()
+            fingerprint = request_fingerprint()
+            existing = claim_key(scope, key, fingerprint)
+            if existing is not None:
+                if existing.fingerprint != fingerprint:
+                    return {"message": "Idempotency-Key was already used with a different request"}, 422
+                if existing.status != 'completed':
+                    return {"message": "A request with this Idempotency-Key is still being processed"}, 409
+                return existing.response_body, existing.response_code, {"Idempotent-Replayed": "true"}
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                db.session.rollback()
+                release_key(scope, key)
+                raise
+
+            body, code = unpack_result(result)
+            if body is None or code >= 500:
+                db.session.rollback()
+                release_key(scope, key)
+            else:
+                complete_key(scope, key, body, code)
+            return result
+        return wrapper
+    return decorator
+
+
+@idempotency_cli.command('purge')
+@with_appcontext
+def purge_command():
+    """Delete expired idempotency keys."""
+    count = IdempotencyKey.query.filter(IdempotencyKey.expires_at < datetime.utcnow()).delete()
+    db.session.commit()
+    print(f"Deleted {count} expired idempotency keys")
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+import click
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import select, text
+from app.models import (
+    db, Cart, CartItem, NotificationJob, Order, OrderItem, Payment, Product, StockReservation, WebhookEvent,
+)
+
+indexes_cli = AppGroup('indexes', help='Index usage checks for hot queries.')
+
+
+def hot_queries():
+    """
+    The lookups every request path depends on, with representative parameters.
+    Each entry is (name, table the query must not seq-scan, index it should
+    use, statement).
+    """
+    now = datetime(2030, 1, 1)
+    return [
+        ("active cart by user", Cart.__tablename__, "ux_carts_user_active",
+         select(Cart).where(Cart.user_id == 1, Cart.is_active == True)),
+        ("cart item by cart and product", CartItem.__tablename__, "ix_cart_items_cart_id_product_id",
+         select(CartItem).where(CartItem.cart_id == 1, CartItem.product_id == 1)),
+        ("orders by user", Order.__tablename__, "ix_order_table_user_id_created_at",
+         select(Order).where(Order.user_id == 1).order_by(Order.created_at.desc())),
+        ("order items by order", OrderItem.__tablename__, "ix_order_items_order_id",
+         select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3]))),
+        ("payment by reference", Payment.__tablename__, "payment_table_reference_key",
+         select(Payment).where(Payment.reference == 'ref')),
+        ("products page by category", Product.__tablename__, "ix_products_categories_id_created_at",
+         select(Product).where(Product.categories_id == 1)
+         .order_by(Product.created_at.desc(), Product.product_id.desc()).limit(20)),
+        ("expired reservation sweep", StockReservation.__tablename__, "ix_stock_reservations_held_expires_at",
+         select(StockReservation).where(StockReservation.status == 'held', StockReservation.expires_at < now)
+         .order_by(StockReservation.product_id).limit(500)),
+        ("due notification jobs", NotificationJob.__tablename__, "ix_notification_jobs_pending_run_at",
+         select(NotificationJob).where(NotificationJob.status == 'pending', NotificationJob.run_at <= now)
+         .order_by(NotificationJob.run_at).limit(50)),
+        ("pending webhook events", WebhookEvent.__tablename__, "ix_webhook_events_pending",
+         select(WebhookEvent).where(WebhookEvent.status == 'pending')
+         .order_by(WebhookEvent.webhook_event_id).limit(100)),
+    ]
+
+
+def seq_scans(plan, table):
+    """Yield every Seq Scan node on `table` in an EXPLAIN (FORMAT JSON) plan."""
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child, table)
+
+
+def index_names(plan):
+    """Yield the name of every index an EXPLAIN (FORMAT JSON) plan reads."""
+    if "Index Name" in plan:
+        yield plan["Index Name"]
+    for child in plan.get("Plans", []):
+        yield from index_names(child)
+
+
+def check_hot_queries():
+    """
+    EXPLAIN every hot query with sequential scans disabled. If the planner
+    still picks a Seq Scan on the target table, no usable index exists; if it
+    settles for another index (e.g. a full scan of the primary key), the one
+    meant for the query is missing or unusable. Returns a list of (name, ok) tuples.
+    """
+    results = []
+    with db.engine.connect() as conn:
+        for name, table, index, stmt in hot_queries():
+            sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+            with conn.begin() as trans:
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+                raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+                trans.rollback()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            results.append((name, not any(seq_scans(plan, table)) and index in index_names(plan)))
+    return results
+
+
+@indexes_cli.command('check')
+@with_appcontext
+def check_command():
+    """Fail if any hot query would not use its index (postgres only)."""
+    if db.engine.dialect.name != 'postgresql':
+        print("Index check needs postgres, skipping.")
+        return
+
+    results = check_hot_queries()
+    for name, ok in results:
+        print(f"{'ok  ' if ok else 'SEQ '} {name}")
+    if not all(ok for _, ok in results):
+        raise click.ClickException("hot queries without a usable index")
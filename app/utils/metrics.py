@@ -0,0 +1,141 @@
+import os
+import time
+from flask import Response, g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import db
+from app.utils.db_pool import pool_stats, pool_wait_stats
+from app.utils.http_client import LATENCY_BUCKETS, http_client
+
+# Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory; every worker
+# writes its samples there and /metrics aggregates them (see gunicorn.conf.py)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.',
+    ['method', 'endpoint', 'status'],
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being served.',
+    multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'db_queries_per_request', 'SQL statements run per request.',
+    ['endpoint'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+DB_TIME = Histogram(
+    'db_query_seconds_per_request', 'Time spent in SQL per request.',
+    ['endpoint'],
+)
+OUTBOUND_LATENCY = Histogram(
+    'outbound_http_request_duration_seconds', 'Outbound HTTP latency by service (paystack, arkesel).',
+    ['service'], buckets=LATENCY_BUCKETS,
+)
+
+POOL_WAIT = Histogram(
+    'db_pool_wait_seconds', 'Time a checkout queued for a free pool slot.',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CONNECT = Histogram(
+    'db_pool_connect_seconds', 'Time spent opening new database connections.',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+# one series per worker (pid label) so a single starved worker stands out
+POOL_GAUGES = {
+    key: Gauge(f'db_pool_{key}', description, multiprocess_mode='liveall')
+    for key, description in (
+        ('pool_size', 'Configured pool size of the worker.'),
+        ('checked_out', 'Connections currently checked out in the worker.'),
+        ('overflow', 'Overflow connections currently open in the worker.'),
+    )
+}
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_seconds' in g:
+        g.query_seconds += time.perf_counter() - conn.info.pop('query_started', time.perf_counter())
+
+
+def observe_outbound(service, seconds):
+    OUTBOUND_LATENCY.labels(service=service).observe(seconds)
+
+
+def observe_pool(kind, seconds):
+    (POOL_CONNECT if kind == 'connect' else POOL_WAIT).observe(seconds)
+
+
+def update_pool_gauges():
+    stats = pool_stats(db.engine)
+    for key, gauge in POOL_GAUGES.items():
+        if key in stats:
+            gauge.set(stats[key])
+
+
+def _endpoint():
+    # the route template, not the path, so ids do not explode label cardinality
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def _observe(status):
+    endpoint = _endpoint()
+    REQUEST_LATENCY.labels(request.method, endpoint, status).observe(time.perf_counter() - g.request_started)
+    DB_QUERIES.labels(endpoint).observe(g.get('query_count', 0))
+    DB_TIME.labels(endpoint).observe(g.query_seconds)
+    g.metrics_observed = True
+
+
+def metrics_view():
+    update_pool_gauges()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app, limiter):
+    """
+    Time every request, track in-flight requests, per-request SQL count and
+    time and the DB pool, and serve it all at /metrics in Prometheus text format.
+    The query count comes from the query_budget listener.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', start_query_timer):
+        event.listen(Engine, 'before_cursor_execute', start_query_timer)
+        event.listen(Engine, 'after_cursor_execute', stop_query_timer)
+    if observe_outbound not in http_client.observers:
+        http_client.observers.append(observe_outbound)
+    if observe_pool not in pool_wait_stats.observers:
+        pool_wait_stats.observers.append(observe_pool)
+
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.query_seconds = 0.0
+        IN_FLIGHT.inc()
+
+    # run ahead of the rate limiter so rejected (429) requests are counted too
+    app.before_request_funcs.setdefault(None, []).insert(0, start_request_timer)
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_started' in g:
+            _observe(response.status_code)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if 'request_started' not in g:
+            return
+        IN_FLIGHT.dec()
+        update_pool_gauges()
+        if not g.get('metrics_observed'):
+            # an unhandled exception skipped after_request
+            _observe(500)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    limiter.exempt(app.view_functions['metrics'])
@@ -0,0 +1,173 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from flask_mail import Message
+from app import mail
+from app.models import db, NotificationJob
+from app.utils.sms_service import send_sms
+
+notifications_cli = AppGroup('notifications', help='Outbound email/SMS queue.')
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+STALE_LOCK_MINUTES = 10
+
+
+class PermanentFailure(Exception):
+    """A job that will never succeed on retry; it goes straight to the dead-letter state."""
+
+
+def enqueue_email(subject, recipients, body):
+    """
+    Queue an email. The job is added to the current session, so it is only
+    persisted when the caller commits.
+    """
+    job = NotificationJob(
+        kind='email',
+        payload={"subject": subject, "recipients": recipients, "body": body},
+        max_attempts=current_app.config.get('NOTIFICATION_MAX_ATTEMPTS', 5),
+    )
+    db.session.add(job)
+    return job
+
+
+def enqueue_sms(phone_number, message):
+    """
+    Queue an SMS. Persisted when the caller commits.
+    """
+    job = NotificationJob(
+        kind='sms',
+        payload={"phone_number": phone_number, "message": message},
+        max_attempts=current_app.config.get('NOTIFICATION_MAX_ATTEMPTS', 5),
+    )
+    db.session.add(job)
+    return job
+
+
+def deliver_email(payload):
+    msg = Message(subject=payload["subject"], recipients=payload["recipients"], body=payload["body"])
+    try:
+        mail.send(msg)
+    except UnicodeEncodeError as e:
+        # Most likely caused by non-ASCII characters in MAIL_USERNAME or MAIL_PASSWORD
+        raise PermanentFailure(f"non-ASCII characters in mail credentials: {e}") from e
+
+
+def deliver_sms(payload):
+    if not send_sms(payload["phone_number"], payload["message"]):
+        raise RuntimeError(f"SMS to {payload['phone_number']} was not accepted")
+
+
+HANDLERS = {
+    'email': deliver_email,
+    'sms': deliver_sms,
+}
+
+
+def retry_delay(attempts):
+    """Exponential backoff with full jitter, capped at RETRY_MAX_SECONDS."""
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempts))
+
+
+def requeue_stale_jobs():
+    """
+    Put back jobs left 'running' by a worker that died mid-delivery.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=STALE_LOCK_MINUTES)
+    NotificationJob.query.filter(
+        NotificationJob.status == 'running', NotificationJob.locked_at < cutoff
+    ).update({"status": "pending", "locked_at": None}, synchronize_session=False)
+    db.session.commit()
+
+
+def claim_jobs(limit):
+    """
+    Atomically claim up to `limit` due jobs. SKIP LOCKED lets several
+    workers poll the same table without handing out a job twice.
+    """
+    now = datetime.utcnow()
+    jobs = (
+        NotificationJob.query
+        .filter(NotificationJob.status == 'pending', NotificationJob.run_at <= now)
+        .order_by(NotificationJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for job in jobs:
+        job.status = 'running'
+        job.locked_at = now
+    job_ids = [job.job_id for job in jobs]
+    db.session.commit()
+    return job_ids
+
+
+def process_job(app, job_id):
+    with app.app_context():
+        job = NotificationJob.query.get(job_id)
+        if not job:
+            return
+
+        job.attempts += 1
+        try:
+            HANDLERS[job.kind](job.payload)
+        except PermanentFailure as e:
+            job.status = 'dead'
+            job.last_error = str(e)
+        except Exception as e:
+            job.last_error = str(e)
+            if job.attempts >= job.max_attempts:
+                job.status = 'dead'
+            else:
+                job.status = 'pending'
+                job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+        else:
+            job.status = 'done'
+            job.last_error = None
+
+        if job.status == 'dead':
+            print(f"Notification job {job.job_id} ({job.kind}) moved to dead-letter: {job.last_error}")
+        job.locked_at = None
+        db.session.commit()
+
+
+def run_worker(app, concurrency=4, poll_interval=1.0):
+    """
+    Poll the queue forever, delivering claimed jobs on a thread pool.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            with app.app_context():
+                requeue_stale_jobs()
+                job_ids = claim_jobs(concurrency * 2)
+
+            if not job_ids:
+                time.sleep(poll_interval)
+                continue
+
+            list(pool.map(lambda job_id: process_job(app, job_id), job_ids))
+
+
+@notifications_cli.command('work')
+@click.option('--concurrency', default=4, show_default=True, help='Delivery threads.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@with_appcontext
+def work_command(concurrency, poll_interval):
+    """Run a notification worker."""
+    print(f"Notification worker started with {concurrency} threads")
+    run_worker(current_app._get_current_object(), concurrency, poll_interval)
+
+
+@notifications_cli.command('retry-dead')
+@with_appcontext
+def retry_dead_command():
+    """Move dead-lettered jobs back to the queue."""
+    count = NotificationJob.query.filter_by(status='dead').update(
+        {"status": "pending", "attempts": 0, "run_at": datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+    print(f"Requeued {count} dead notification jobs")
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+import click
+from flask.cli import AppGroup
+from werkzeug.security import generate_password_hash, check_password_hash
+
+passwords_cli = AppGroup('passwords', help='Password hashing pool.')
+
+
+class HasherBusy(Exception):
+    """Raised when every hashing slot is taken; the request should get a 503."""
+
+
+class PasswordHasher:
+    """
+    Runs werkzeug's scrypt/pbkdf2 hashing in a small process pool so the
+    CPU-bound work does not hold up the request thread's GIL.
+    At most `workers + queue_size` hashes are in flight per process; beyond
+    that callers get HasherBusy instead of piling up behind the pool.
+    With workers=0 hashing runs inline (CLI commands, local runs).
+    """
+
+    def __init__(self):
+        self.method = 'scrypt'
+        self.workers = 0
+        self.queue_size = 0
+        self.timeout = 10
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._prefix = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = int(app.config.get('PASSWORD_HASH_WORKERS', self.workers))
+        self.queue_size = int(app.config.get('PASSWORD_HASH_QUEUE', self.queue_size))
+        self.timeout = float(app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout))
+        self._prefix = None
+        self.reset()
+
+    def reset(self):
+        """
+        Drop the process pool, e.g. in a freshly forked worker. The next hash
+        starts a new pool owned by the current process.
+        """
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+            self._slots = threading.BoundedSemaphore(self.workers + self.queue_size) if self.workers else None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # never fork a multi-threaded gthread worker directly, the child can
+                # inherit a held lock and deadlock; forkserver starts from a clean process
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy("password hashing pool is saturated")
+        try:
+            future = self._pool().submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        # the slot is freed when the hash finishes, not when we stop waiting for
+        # it, so timed out hashes still count against workers + queue_size
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout as e:
+            raise HasherBusy("password hashing timed out") from e
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        True when the stored hash was made with a different algorithm or cost
+        than PASSWORD_HASH_METHOD, e.g. after raising the scrypt work factor.
+        """
+        if self._prefix is None:
+            # werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"),
+            # so compare against the prefix of a real hash
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+
+password_hasher = PasswordHasher()
+
+
+@passwords_cli.command('bench')
+@click.option('--seconds', default=5.0, show_default=True, help='How long to run.')
+@click.option('--concurrency', default=None, type=int, help='Parallel logins, defaults to the pool size.')
+def bench(seconds, concurrency):
+    """
+    Measure password verifications (logins) per second with the configured
+    method and pool, to size PASSWORD_HASH_WORKERS and the cost parameters.
+    """
+    workers = password_hasher.workers or 1
+    concurrency = concurrency or workers
+    stored = generate_password_hash('correct horse battery staple', password_hasher.method)
+    done, busy = [0], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def login():
+        while time.monotonic() < deadline:
+            try:
+                password_hasher.verify(stored, 'correct horse battery staple')
+            except HasherBusy:
+                with lock:
+                    busy[0] += 1
+                continue
+            with lock:
+                done[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=login) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    rate = done[0] / elapsed
+    print(f"method={stored.split('$', 1)[0]} workers={password_hasher.workers} concurrency={concurrency}")
+    print(f"{done[0]} logins in {elapsed:.2f}s: {rate:.1f}/s, {rate / workers:.1f}/s per core, {busy[0]} rejected as busy")
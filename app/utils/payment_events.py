@@ -0,0 +1,171 @@
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import update
+from app.models import db, Order, Payment, WebhookEvent
+from app.utils.sql import upsert_insert
+from app.utils.stock import commit_reservations, reclaim_released_stock
+
+webhooks_cli = AppGroup('webhooks', help='Paystack webhook inbox.')
+
+MAX_EVENT_ATTEMPTS = 5
+
+
+def verify_signature(raw_body, signature, secret_key):
+    """
+    Paystack signs the raw request body with HMAC-SHA512 using the secret key.
+    """
+    if not signature or not secret_key:
+        return False
+    expected = hmac.new(secret_key.encode(), raw_body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def record_event(event, raw_body):
+    """
+    Store a webhook delivery in the inbox. Redeliveries of the same event are
+    ignored by the unique event_id. Returns True if the event was new.
+    """
+    data = event.get("data") or {}
+    identifier = data.get('id') or data.get('reference')
+    if identifier:
+        event_id = f"{event['event']}:{identifier}"
+    else:
+        # "<event>:None" would dedupe every such event into the first one; the
+        # body hash still drops byte-identical redeliveries
+        event_id = f"sha256:{hashlib.sha256(raw_body).hexdigest()}"
+        print(f"Webhook {event['event']} has no transaction id or reference, keyed as {event_id}")
+    table = WebhookEvent.__table__
+    stmt = upsert_insert(table).values(
+        event_id=event_id,
+        event=event["event"],
+        reference=data.get("reference"),
+        payload=event,
+        status='pending',
+        attempts=0,
+        received_at=datetime.utcnow(),
+    ).on_conflict_do_nothing(index_elements=[table.c.event_id]).returning(table.c.webhook_event_id)
+    inserted = db.session.execute(stmt).first()
+    db.session.commit()
+    return inserted is not None
+
+
+def mark_payments_successful(references):
+    """
+    Mark payments successful by reference in one UPDATE, then move their
+    pending orders to 'paid' and commit their stock reservations.
+    Orders whose hold expired before the customer paid get their stock back
+    if it is still available, otherwise they are flagged 'refund_required'.
+    Returns the ids of the orders that were paid.
+    """
+    if not references:
+        return set()
+    result = db.session.execute(
+        update(Payment)
+        .where(Payment.reference.in_(references), Payment.status != 'successful')
+        .values(status='successful')
+        .returning(Payment.order_id)
+        .execution_options(synchronize_session=False)
+    )
+    order_ids = {order_id for (order_id,) in result if order_id is not None}
+    if order_ids:
+        db.session.execute(
+            update(Order)
+            .where(Order.order_id.in_(order_ids), Order.status == 'pending')
+            .values(status='paid')
+            .execution_options(synchronize_session=False)
+        )
+        commit_reservations(order_ids)
+
+        expired = Order.query.filter(Order.order_id.in_(order_ids), Order.status == 'expired').all()
+        for order in expired:
+            if reclaim_released_stock(order.order_id):
+                order.status = 'paid'
+            else:
+                order.status = 'refund_required'
+                order_ids.discard(order.order_id)
+                print(f"Order {order.order_id} was paid after its stock was released and is sold out, refund required")
+    return order_ids
+
+
+def process_batch(batch_size=500):
+    """
+    Claim a batch of pending inbox events and apply them with set-based
+    updates. If the batch fails, its events are retried one by one and only
+    those that fail again count an attempt; at MAX_EVENT_ATTEMPTS an event is
+    marked failed. Returns the number of events handled.
+    """
+    events = (
+        WebhookEvent.query
+        .filter(WebhookEvent.status == 'pending')
+        .order_by(WebhookEvent.webhook_event_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not events:
+        return 0
+
+    references = {e.reference for e in events if e.event == 'charge.success' and e.reference}
+    now = datetime.utcnow()
+    failures = {}
+    try:
+        with db.session.begin_nested():
+            mark_payments_successful(references)
+    except Exception:
+        # find the culprit(s): apply the events one at a time, each in its own
+        # savepoint, so only the events that fail are charged an attempt. The
+        # batch's row locks are held throughout
+        for event in events:
+            if event.event != 'charge.success' or not event.reference:
+                continue
+            try:
+                with db.session.begin_nested():
+                    mark_payments_successful([event.reference])
+            except Exception as e:
+                failures[event.webhook_event_id] = e
+
+    for event in events:
+        event.attempts += 1
+        error = failures.get(event.webhook_event_id)
+        if error is None:
+            # events other than charge.success are stored for audit only
+            event.status = 'processed'
+            event.processed_at = now
+            continue
+        event.last_error = str(error)
+        if event.attempts >= MAX_EVENT_ATTEMPTS:
+            event.status = 'failed'
+        print(f"Webhook event {event.event_id} failed (attempt {event.attempts}): {error}")
+    db.session.commit()
+    return len(events)
+
+
+@webhooks_cli.command('consume')
+@click.option('--batch-size', default=500, show_default=True)
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@with_appcontext
+def consume_command(batch_size, poll_interval):
+    """Process webhook events from the inbox until stopped."""
+    print("Webhook consumer started")
+    while True:
+        if process_batch(batch_size) < batch_size:
+            time.sleep(poll_interval)
+
+
+@webhooks_cli.command('purge')
+@click.option('--days', default=None, type=int, help='Keep this many days, defaults to WEBHOOK_EVENT_RETENTION_DAYS.')
+@with_appcontext
+def purge_command(days):
+    """Delete processed webhook events older than the retention period."""
+    days = days if days is not None else current_app.config.get('WEBHOOK_EVENT_RETENTION_DAYS', 30)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    count = WebhookEvent.query.filter(
+        WebhookEvent.status == 'processed', WebhookEvent.processed_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    print(f"Deleted {count} processed webhook events older than {days} days")
@@ -0,0 +1,48 @@
+from functools import wraps
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when QUERY_BUDGET_ENFORCE is on and a request runs too many queries."""
+
+
+def query_budget(max_queries):
+    """
+    Decorator declaring the maximum number of SQL statements a resource
+    method may run per request.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            g.query_budget = max_queries
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def init_app(app):
+    """
+    Count statements per request and check them against the declared budget.
+    With QUERY_BUDGET_ENFORCE (used by the test suite) an overrun raises,
+    otherwise it is only logged.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', count_query):
+        event.listen(Engine, 'before_cursor_execute', count_query)
+
+    @app.after_request
+    def check_query_budget(response):
+        budget = g.get('query_budget')
+        count = g.get('query_count', 0)
+        if budget is not None and count > budget:
+            message = f"{request.method} {request.path} ran {count} queries, budget is {budget}"
+            if app.config.get('QUERY_BUDGET_ENFORCE'):
+                raise QueryBudgetExceeded(message)
+            print(f"Query budget exceeded: {message}")
+        return response
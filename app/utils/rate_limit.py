@@ -0,0 +1,23 @@
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_limiter.util import get_remote_address
+
+# Read paths are paged (keyset cursors) and polled with ETags, so they need far
+# more headroom than the 5/minute used for writes and auth
+CATALOG_READ_LIMIT = "120 per minute"
+CART_LIMIT = "60 per minute"
+
+
+def rate_limit_key():
+    """
+    Rate limit key: the JWT identity when the request carries a valid token,
+    otherwise the client address. Keys users across workers and nodes
+    instead of per shared NAT address.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if identity:
+        return f"user:{identity}"
+    return f"ip:{get_remote_address()}"
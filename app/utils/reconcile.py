@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import update
+from app.models import db, Payment
+from app.utils.http_client import http_client
+from app.utils.payment_events import mark_payments_successful
+from app.utils.money import to_pesewas
+
+payments_cli = AppGroup('payments', help='Payment maintenance.')
+
+LOOKUP_CHUNK = 1000
+FAILED_STATUSES = {"failed", "abandoned", "reversed"}
+
+
+def fetch_page(page, per_page, params):
+    """Fetch one page of the Paystack transaction list."""
+    config = current_app.config
+    response = http_client.get(
+        f"{config['PAYSTACK_BASE_URL']}/transaction",
+        service="paystack",
+        headers={"Authorization": f"Bearer {config['PAYSTACK_SECRET_KEY']}"},
+        params={**params, "page": page, "perPage": per_page},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_remote_statuses(per_page, concurrency, params):
+    """
+    Page through the transaction list and return {reference: (status, amount in pesewas)}.
+    The first page gives the page count; the rest are fetched in parallel,
+    never more than `concurrency` requests at once.
+    """
+    first = fetch_page(1, per_page, params)
+    statuses = {t["reference"]: (t["status"], t.get("amount")) for t in first.get("data", [])}
+    page_count = int((first.get("meta") or {}).get("pageCount") or 1)
+
+    app = current_app._get_current_object()
+
+    def fetch(page):
+        with app.app_context():
+            return fetch_page(page, per_page, params)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for body in pool.map(fetch, range(2, page_count + 1)):
+            statuses.update({t["reference"]: (t["status"], t.get("amount")) for t in body.get("data", [])})
+    return statuses
+
+
+def local_statuses(references):
+    """{reference: (status, amount)} for the local payments among `references`, in chunked IN queries."""
+    references = list(references)
+    found = {}
+    for start in range(0, len(references), LOOKUP_CHUNK):
+        chunk = references[start:start + LOOKUP_CHUNK]
+        rows = db.session.query(Payment.reference, Payment.status, Payment.amount).filter(Payment.reference.in_(chunk))
+        found.update({reference: (status, amount) for reference, status, amount in rows})
+    return found
+
+
+def diff_statuses(remote, local):
+    """
+    References to correct: paid upstream but not locally, and failed
+    upstream while still pending locally. Payments whose amount differs
+    from what Paystack charged are reported instead of corrected.
+    """
+    to_succeed, to_fail, mismatched = [], [], []
+    for reference, (local_status, local_amount) in local.items():
+        remote_status, remote_amount = remote[reference]
+        if remote_amount is not None and int(remote_amount) != to_pesewas(local_amount):
+            mismatched.append(reference)
+        elif remote_status == "success" and (local_status or "").lower() != "successful":
+            to_succeed.append(reference)
+        elif remote_status in FAILED_STATUSES and local_status == "pending":
+            to_fail.append(reference)
+    return to_succeed, to_fail, mismatched
+
+
+def apply_corrections(to_succeed, to_fail, batch_size):
+    for start in range(0, len(to_succeed), batch_size):
+        mark_payments_successful(to_succeed[start:start + batch_size])
+        db.session.commit()
+    for start in range(0, len(to_fail), batch_size):
+        db.session.execute(
+            update(Payment)
+            .where(Payment.reference.in_(to_fail[start:start + batch_size]), Payment.status == 'pending')
+            .values(status='failed')
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+
+@payments_cli.command('reconcile')
+@click.option('--since', type=click.DateTime(formats=["%Y-%m-%d"]), help='Only transactions from this date.')
+@click.option('--per-page', default=100, show_default=True)
+@click.option('--concurrency', default=4, show_default=True, help='Parallel page fetches.')
+@click.option('--batch-size', default=500, show_default=True, help='References updated per transaction.')
+@click.option('--dry-run', is_flag=True, help='Report differences without changing anything.')
+@with_appcontext
+def reconcile_command(since, per_page, concurrency, batch_size, dry_run):
+    """Correct local payment statuses against Paystack's transaction list."""
+    params = {"from": since.strftime("%Y-%m-%d")} if since else {}
+    started = datetime.utcnow()
+
+    remote = fetch_remote_statuses(per_page, concurrency, params)
+    local = local_statuses(remote.keys())
+    to_succeed, to_fail, mismatched = diff_statuses(remote, local)
+
+    print(
+        f"Fetched {len(remote)} transactions, {len(local)} known locally: "
+        f"{len(to_succeed)} to mark successful, {len(to_fail)} to mark failed"
+    )
+    for reference in mismatched:
+        print(f"Amount mismatch for {reference}: local {local[reference][1]}, paystack {remote[reference][1]} pesewas")
+    if dry_run:
+        return
+    apply_corrections(to_succeed, to_fail, batch_size)
+    print(f"Reconciliation finished in {(datetime.utcnow() - started).total_seconds():.1f}s")
@@ -0,0 +1,127 @@
+import math
+import re
+from collections import defaultdict
+from sqlalchemy import and_, func, or_
+from app.models import db, Product
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Field weights mirror the setweight() labels used by the search_vector column
+FIELD_WEIGHTS = {"name": 1.0, "brand": 0.4, "description": 0.2}
+
+# pg_trgm's default similarity threshold, checked with similarity() so it does not
+# depend on the pg_trgm.similarity_threshold setting of the connection
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigram_match(column, query):
+    """
+    `column % query`, the pg_trgm operator the trigram GIN index can answer;
+    similarity() alone is a function call and forces a sequential scan.
+    op() is emitted verbatim, so the % is escaped for format-paramstyle
+    drivers (pg8000, psycopg2), which otherwise reject it as a placeholder.
+    """
+    operator = "%%" if db.engine.dialect.paramstyle in ("format", "pyformat") else "%"
+    return column.op(operator)(query)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """
+    Small in-memory inverted index over product name/brand/description.
+    Used when the database has no full-text support (e.g. SQLite test runs).
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_count = 0
+
+    def add(self, product_id, fields):
+        self.doc_count += 1
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                postings = self.postings[token]
+                postings[product_id] = postings.get(product_id, 0.0) + weight
+
+    def search(self, query, limit):
+        """
+        Return up to `limit` product ids ranked by a tf-idf style score.
+        Every query term must match (prefix match on the last term).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for position, term in enumerate(terms):
+            if position == len(terms) - 1:
+                matched = [t for t in self.postings if t.startswith(term)]
+            else:
+                matched = [term] if term in self.postings else []
+
+            term_scores = defaultdict(float)
+            for token in matched:
+                postings = self.postings[token]
+                idf = math.log(1 + self.doc_count / len(postings))
+                for product_id, tf in postings.items():
+                    term_scores[product_id] += tf * idf
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pid: s + term_scores[pid] for pid, s in scores.items() if pid in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [product_id for product_id, _ in ranked[:limit]]
+
+
+_fallback_index = {"key": None, "index": None}
+
+
+def get_fallback_index():
+    """
+    Build (or reuse) the in-memory index. It is rebuilt whenever the product
+    count or the latest updated_at changes.
+    """
+    key = db.session.query(func.count(Product.product_id), func.max(Product.updated_at)).one()
+    if _fallback_index["key"] != tuple(key):
+        index = InvertedIndex()
+        rows = db.session.query(
+            Product.product_id, Product.name, Product.brand, Product.description
+        ).yield_per(1000)
+        for product_id, name, brand, description in rows:
+            index.add(product_id, {"name": name, "brand": brand, "description": description})
+        _fallback_index["key"] = tuple(key)
+        _fallback_index["index"] = index
+    return _fallback_index["index"]
+
+
+def search_products(query, limit):
+    """
+    Return up to `limit` products matching `query`, best match first.
+    """
+    if db.engine.dialect.name == "postgresql":
+        tsquery = func.websearch_to_tsquery("simple", query)
+        similarity = func.similarity(Product.name, query)
+        rank = func.greatest(func.ts_rank(Product.search_vector, tsquery), similarity)
+        return (
+            Product.query
+            .filter(or_(
+                Product.search_vector.op("@@")(tsquery),
+                and_(trigram_match(Product.name, query), similarity > SIMILARITY_THRESHOLD),
+            ))
+            .order_by(rank.desc(), Product.product_id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    product_ids = get_fallback_index().search(query, limit)
+    if not product_ids:
+        return []
+    products = {p.product_id: p for p in Product.query.filter(Product.product_id.in_(product_ids))}
+    return [products[pid] for pid in product_ids if pid in products]
@@ -1,11 +1,11 @@
 import os
 import requests
-from dotenv import load_dotenv
+from app.utils.http_client import http_client
 
-load_dotenv()
 
 ARKESEL_API_KEY = os.getenv("ARKESEL_API_KEY")
 ARKESEL_SENDER_ID = os.getenv("ARKESEL_SENDER_ID", "Huncho.clothing")
+ARKESEL_BASE_URL = os.getenv("ARKESEL_BASE_URL", "https://sms.arkesel.com")
 
 # Normalize the API key loaded from the environment: strip surrounding quotes and whitespace
 if ARKESEL_API_KEY:
@@ -23,7 +23,7 @@ def send_sms(phone_number, message):
         print("ARKESEL_API_KEY not set. Skipping SMS send.")
         return False
 
-    url = "https://sms.arkesel.com/api/v2/sms/send"
+    url = f"{ARKESEL_BASE_URL}/api/v2/sms/send"
 
     # Some APIs expect the api-key header as 'api-key' while others expect Authorization Bearer.
     # Include both to increase compatibility; the server will ignore the unused one.
@@ -40,7 +40,7 @@ def send_sms(phone_number, message):
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = http_client.post(url, service="arkesel", json=payload, headers=headers)
     except requests.exceptions.RequestException as e:
         # Network error / timeout / DNS issue
         print(f"Network error while sending SMS to {phone_number}: {e}")
@@ -0,0 +1,9 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import db
+
+
+def upsert_insert(table):
+    """INSERT construct with ON CONFLICT support for the current dialect."""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import click
+from flask.cli import AppGroup
+
+startup_cli = AppGroup('startup', help='Cold start diagnostics.')
+
+# Runs in a fresh interpreter; prints the seconds spent importing run.py (create_app included)
+PROFILE_SNIPPET = (
+    "import time; started = time.perf_counter(); import run; "
+    "print(f'{time.perf_counter() - started:.6f}')"
+)
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output into (module, depth, self_us, cumulative_us).
+    Nesting is shown by two spaces of indent per level.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, self_us, cumulative_us))
+    return rows
+
+
+@startup_cli.command('profile')
+@click.option('--top', default=25, show_default=True, help='How many entries to list.')
+def profile(top):
+    """
+    Import the web app in a fresh interpreter with -X importtime and report
+    where cold start time goes: total, per top-level package and per module.
+    """
+    env = dict(os.environ)
+    # measure the web process, which skips the CLI-only imports
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILE_SNIPPET],
+        capture_output=True, text=True, env=env, cwd=os.getcwd(),
+    )
+    if result.returncode:
+        print(result.stderr[-2000:])
+        raise SystemExit(result.returncode)
+
+    rows = parse_importtime(result.stderr)
+    total = float(result.stdout.strip().splitlines()[-1])
+    print(f"import run (create_app included): {total * 1000:.1f} ms, {len(rows)} modules imported")
+
+    packages = {}
+    for name, depth, _, cumulative_us in rows:
+        if depth == 0:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + cumulative_us
+
+    print(f"\nTop {top} top-level packages by cumulative import time:")
+    for package, cumulative_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {package}")
+
+    print(f"\nTop {top} modules by self import time:")
+    for name, _, self_us, _ in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
@@ -0,0 +1,156 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import update
+from app.models import db, Order, Product, StockReservation
+from app.utils.cache import product_cache
+
+stock_cli = AppGroup('stock', help='Stock reservation maintenance.')
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id):
+        super().__init__(f"Insufficient stock for product {product_id}")
+        self.product_id = product_id
+
+
+def reserve_stock(order_id, lines):
+    """
+    Decrement stock for every (product_id, quantity) line of an order and
+    record a held reservation for each product, in the caller's transaction.
+
+    Each product is decremented with a conditional UPDATE so concurrent
+    checkouts can never drive stock below zero. Products are locked in
+    product_id order so two orders sharing SKUs cannot deadlock.
+    Raises InsufficientStock; the caller must roll back.
+    """
+    quantities = Counter()
+    for product_id, quantity in lines:
+        quantities[product_id] += quantity
+
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        result = db.session.execute(
+            update(Product)
+            .where(Product.product_id == product_id, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise InsufficientStock(product_id)
+
+    ttl = current_app.config.get('STOCK_RESERVATION_TTL_MINUTES', 15)
+    expires_at = datetime.utcnow() + timedelta(minutes=ttl)
+    db.session.execute(StockReservation.__table__.insert().values([
+        {
+            "order_id": order_id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "status": "held",
+            "expires_at": expires_at,
+            "created_at": datetime.utcnow(),
+        }
+        for product_id, quantity in sorted(quantities.items())
+    ]))
+    product_cache.invalidate_on_commit(db.session, quantities.keys())
+
+
+def commit_reservations(order_ids):
+    """
+    Make the held stock of paid orders permanent.
+    """
+    db.session.execute(
+        update(StockReservation)
+        .where(StockReservation.order_id.in_(order_ids), StockReservation.status == 'held')
+        .values(status='committed')
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reclaim_released_stock(order_id):
+    """
+    Take stock again for an order that was paid after its hold expired and
+    its stock was released. All or nothing: if any product has sold out in
+    the meantime nothing is taken and False is returned.
+    """
+    released = (
+        StockReservation.query
+        .filter_by(order_id=order_id, status='released')
+        .order_by(StockReservation.product_id)
+        .all()
+    )
+    savepoint = db.session.begin_nested()
+    for reservation in released:
+        result = db.session.execute(
+            update(Product)
+            .where(Product.product_id == reservation.product_id, Product.stock >= reservation.quantity)
+            .values(stock=Product.stock - reservation.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            savepoint.rollback()
+            return False
+    for reservation in released:
+        reservation.status = 'committed'
+    savepoint.commit()
+    product_cache.invalidate_on_commit(db.session, {r.product_id for r in released})
+    return True
+
+
+def release_expired_reservations(now=None, batch_size=500):
+    """
+    Return stock held by unpaid orders whose reservation has expired and
+    mark those orders as expired. Rows locked by another worker are skipped.
+    Returns the number of reservations released.
+    """
+    now = now or datetime.utcnow()
+    expired = (
+        StockReservation.query
+        .filter(StockReservation.status == 'held', StockReservation.expires_at < now)
+        .order_by(StockReservation.product_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not expired:
+        return 0
+
+    for reservation in expired:
+        db.session.execute(
+            update(Product)
+            .where(Product.product_id == reservation.product_id)
+            .values(stock=Product.stock + reservation.quantity)
+            .execution_options(synchronize_session=False)
+        )
+        reservation.status = 'released'
+
+    order_ids = {r.order_id for r in expired}
+    Order.query.filter(Order.order_id.in_(order_ids), Order.status == 'pending').update(
+        {"status": "expired"}, synchronize_session=False
+    )
+    product_cache.invalidate_on_commit(db.session, {r.product_id for r in expired})
+    db.session.commit()
+    return len(expired)
+
+
+@stock_cli.command('release-expired')
+@click.option('--batch-size', default=500, show_default=True)
+@click.option('--loop', is_flag=True, help='Keep sweeping until stopped (the sweeper process).')
+@click.option('--interval', default=60.0, show_default=True, help='Seconds between sweeps with --loop.')
+def release_expired_command(batch_size, loop, interval):
+    """Release stock held by expired, unpaid orders."""
+    while True:
+        total = 0
+        while True:
+            released = release_expired_reservations(batch_size=batch_size)
+            total += released
+            if released < batch_size:
+                break
+        if total or not loop:
+            print(f"Released {total} expired stock reservations")
+        if not loop:
+            break
+        time.sleep(interval)
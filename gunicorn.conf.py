@@ -0,0 +1,130 @@
+"""
+gunicorn settings, picked up automatically from the working directory:
+
+    gunicorn run:app
+
+Sizing follows the recipe in app/utils/db_pool.py: one worker per CPU
+available to the container, a DB pool as large as the worker's threads and
+no overflow, so the app never opens more than workers * threads connections.
+Anything set in env wins.
+
+There is deliberately no ASGI entry point. The app, Flask-SQLAlchemy and
+the requests-based Paystack/Arkesel clients are all synchronous, so an
+ASGI adapter (a2wsgi under uvicorn) would run each request on a thread
+pool, the same model as gthread with the adapter's overhead on top. An
+async stack only pays off once the DB and outbound HTTP layers are async
+end to end, which would be a rewrite of every resource.
+"""
+import math
+import multiprocessing
+import os
+import tempfile
+
+
+def available_cpus():
+    """
+    CPUs this process may actually use: the affinity mask, capped by a
+    cgroup CPU quota (cpu_count() reports the host's CPUs inside containers).
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = multiprocessing.cpu_count()
+    for quota_file, period_file in (
+        ('/sys/fs/cgroup/cpu.max', None),  # cgroup v2: "<quota> <period>" or "max <period>"
+        ('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', '/sys/fs/cgroup/cpu/cpu.cfs_period_us'),  # cgroup v1
+    ):
+        try:
+            with open(quota_file) as f:
+                values = f.read().split()
+            if period_file:
+                with open(period_file) as f:
+                    values.append(f.read().strip())
+            quota, period = values[0], values[-1]
+            if quota not in ('max', '-1'):
+                count = min(count, math.ceil(int(quota) / int(period)))
+            break
+        except (OSError, ValueError, IndexError):
+            continue
+    return max(count, 1)
+
+
+# gthread (default) or gevent; gevent must be installed separately
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # patch before the app (and ssl, socket users) are imported by preload
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 7000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', available_cpus()))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+
+# One connection per thread; gevent greenlets share a fixed pool and queue for it.
+# Set before the app is imported so create_app picks these up.
+os.environ.setdefault('DB_POOL_SIZE', str(threads if worker_class == 'gthread' else 10))
+os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+# Connections this service may hold; postgres' default max_connections is 100 and a
+# rolling deploy runs old and new workers side by side
+DB_CONNECTION_BUDGET = int(os.getenv('DB_CONNECTION_BUDGET', 40))
+
+# Import the app once in the master and fork workers from it, sharing the
+# imported code copy-on-write instead of importing it in every worker
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Recycle workers now and then to cap slow leaks; jitter keeps them from restarting together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+
+# Workers write Prometheus samples here and /metrics sums them. It must exist
+# before preload imports prometheus_client; a fresh directory per master keeps
+# samples from a previous run out of the totals
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='huncho-prometheus-')
+
+
+def when_ready(server):
+    per_worker = int(os.environ['DB_POOL_SIZE']) + int(os.environ['DB_MAX_OVERFLOW'])
+    total = workers * per_worker
+    server.log.info(f"{workers} workers x {per_worker} DB connections = {total} (budget {DB_CONNECTION_BUDGET})")
+    if total > DB_CONNECTION_BUDGET:
+        server.log.warning(
+            "DB connections can exceed DB_CONNECTION_BUDGET; lower WEB_CONCURRENCY, "
+            "GUNICORN_THREADS or DB_POOL_SIZE (see app/utils/db_pool.py)"
+        )
+
+
+def post_fork(server, worker):
+    """
+    With preload_app the master may already hold DB connections and HTTP
+    sessions (create_app touches the engine). Sockets must not be shared
+    across processes, so each worker drops what it inherited and opens its own.
+    """
+    if not server.cfg.preload_app:
+        return
+
+    from run import app
+    from app import db
+    from app.utils.http_client import http_client
+    from app.utils.passwords import password_hasher
+
+    with app.app_context():
+        # close=False leaves the parent's connections alone and just forgets them here
+        db.engine.dispose(close=False)
+    http_client.reset()
+    password_hasher.reset()
+    server.log.info(f"Worker {worker.pid} reset inherited connections")
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,47 @@
+"""product search indexes
+
+Revision ID: 3d8e5b21c7a4
+Revises: 96141b2244b4
+Create Date: 2026-10-17 09:12:40.318204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8e5b21c7a4'
+down_revision = '96141b2244b4'
+branch_labels = None
+depends_on = None
+
+TRGM_COLUMNS = ['name', 'brand', 'size', 'color']
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Weighted full-text vector, kept up to date by postgres itself
+    op.execute("""
+        ALTER TABLE products.products_table
+        ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(brand, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+        ) STORED
+    """)
+    op.create_index('ix_products_search_vector', 'products_table', ['search_vector'],
+                    unique=False, schema='products', postgresql_using='gin')
+
+    # Trigram indexes let the ilike('%x%') filters on /products use an index scan
+    for column in TRGM_COLUMNS:
+        op.create_index(f'ix_products_{column}_trgm', 'products_table', [column],
+                        unique=False, schema='products', postgresql_using='gin',
+                        postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    for column in TRGM_COLUMNS:
+        op.drop_index(f'ix_products_{column}_trgm', table_name='products_table', schema='products')
+    op.drop_index('ix_products_search_vector', table_name='products_table', schema='products')
+    op.drop_column('products_table', 'search_vector', schema='products')
@@ -0,0 +1,40 @@
+"""idempotency keys
+
+Revision ID: 5f2a9c80d1b7
+Revises: e7b9d3a45c18
+Create Date: 2026-10-17 15:41:09.218374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2a9c80d1b7'
+down_revision = 'e7b9d3a45c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE SCHEMA IF NOT EXISTS idempotency')
+    op.create_table('idempotency_keys',
+    sa.Column('idempotency_key_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('scope', sa.String(length=255), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('response_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('idempotency_key_id'),
+    sa.UniqueConstraint('scope', 'key', name='unique_scope_key'),
+    schema='idempotency'
+    )
+    op.create_index(op.f('ix_idempotency_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False, schema='idempotency')
+
+
+def downgrade():
+    op.drop_index(op.f('ix_idempotency_idempotency_keys_expires_at'), table_name='idempotency_keys', schema='idempotency')
+    op.drop_table('idempotency_keys', schema='idempotency')
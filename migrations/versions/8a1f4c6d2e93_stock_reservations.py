@@ -0,0 +1,42 @@
+"""stock reservations
+
+Revision ID: 8a1f4c6d2e93
+Revises: 3d8e5b21c7a4
+Create Date: 2026-10-17 11:03:27.551842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a1f4c6d2e93'
+down_revision = '3d8e5b21c7a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_reservations',
+    sa.Column('reservation_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('order_id', sa.BigInteger(), nullable=False),
+    sa.Column('product_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.order_table.order_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.products_table.product_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('reservation_id'),
+    schema='orders'
+    )
+    op.create_index(op.f('ix_orders_stock_reservations_order_id'), 'stock_reservations', ['order_id'], unique=False, schema='orders')
+    # the expiry sweep only ever looks at held rows
+    op.create_index('ix_stock_reservations_held_expires_at', 'stock_reservations', ['expires_at'],
+                    unique=False, schema='orders', postgresql_where=sa.text("status = 'held'"))
+
+
+def downgrade():
+    op.drop_index('ix_stock_reservations_held_expires_at', table_name='stock_reservations', schema='orders')
+    op.drop_index(op.f('ix_orders_stock_reservations_order_id'), table_name='stock_reservations', schema='orders')
+    op.drop_table('stock_reservations', schema='orders')
@@ -0,0 +1,42 @@
+"""webhook events
+
+Revision ID: a94e7d3b6c05
+Revises: 5f2a9c80d1b7
+Create Date: 2026-10-17 16:27:45.603912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a94e7d3b6c05'
+down_revision = '5f2a9c80d1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('webhook_events',
+    sa.Column('webhook_event_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('event_id', sa.String(length=150), nullable=False),
+    sa.Column('event', sa.String(length=100), nullable=False),
+    sa.Column('reference', sa.String(length=150), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('webhook_event_id'),
+    sa.UniqueConstraint('event_id'),
+    schema='payment'
+    )
+    # the consumer only scans pending events
+    op.create_index('ix_webhook_events_pending', 'webhook_events', ['webhook_event_id'],
+                    unique=False, schema='payment', postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    op.drop_index('ix_webhook_events_pending', table_name='webhook_events', schema='payment')
+    op.drop_table('webhook_events', schema='payment')
@@ -0,0 +1,43 @@
+"""notification jobs
+
+Revision ID: c52e0b7f9a16
+Revises: 8a1f4c6d2e93
+Create Date: 2026-10-17 12:20:51.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e0b7f9a16'
+down_revision = '8a1f4c6d2e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE SCHEMA IF NOT EXISTS notifications')
+    op.create_table('notification_jobs',
+    sa.Column('job_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id'),
+    schema='notifications'
+    )
+    # workers poll for due pending jobs only
+    op.create_index('ix_notification_jobs_pending_run_at', 'notification_jobs', ['run_at'],
+                    unique=False, schema='notifications', postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    op.drop_index('ix_notification_jobs_pending_run_at', table_name='notification_jobs', schema='notifications')
+    op.drop_table('notification_jobs', schema='notifications')
@@ -0,0 +1,53 @@
+"""hot path indexes
+
+Revision ID: e7b9d3a45c18
+Revises: c52e0b7f9a16
+Create Date: 2026-10-17 14:02:16.447930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b9d3a45c18'
+down_revision = 'c52e0b7f9a16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A user may only have one active cart; deactivate older duplicates first
+    op.execute("""
+        UPDATE cart.carts SET is_active = false
+        WHERE is_active AND cart_id NOT IN (
+            SELECT max(cart_id) FROM cart.carts WHERE is_active GROUP BY user_id
+        )
+    """)
+
+    # CONCURRENTLY avoids locking hot tables but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ux_carts_user_active', 'carts', ['user_id'], unique=True, schema='cart',
+                        postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_cart_items_cart_id_product_id', 'cart_items', ['cart_id', 'product_id'],
+                        unique=False, schema='cart', postgresql_concurrently=True)
+        op.create_index('ix_order_table_user_id_created_at', 'order_table', ['user_id', sa.text('created_at DESC')],
+                        unique=False, schema='orders', postgresql_concurrently=True)
+        op.create_index('ix_order_items_order_id', 'order_items', ['order_id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_products_created_at_product_id', 'products_table',
+                        [sa.text('created_at DESC'), sa.text('product_id DESC')],
+                        unique=False, schema='products', postgresql_concurrently=True)
+        op.create_index('ix_products_categories_id_created_at', 'products_table',
+                        ['categories_id', sa.text('created_at DESC'), sa.text('product_id DESC')],
+                        unique=False, schema='products', postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_categories_id_created_at', table_name='products_table', schema='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_created_at_product_id', table_name='products_table', schema='products', postgresql_concurrently=True)
+        op.drop_index('ix_order_items_order_id', table_name='order_items', postgresql_concurrently=True)
+        op.drop_index('ix_order_table_user_id_created_at', table_name='order_table', schema='orders', postgresql_concurrently=True)
+        op.drop_index('ix_cart_items_cart_id_product_id', table_name='cart_items', schema='cart', postgresql_concurrently=True)
+        op.drop_index('ux_carts_user_active', table_name='carts', schema='cart', postgresql_concurrently=True)
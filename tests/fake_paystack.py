@@ -0,0 +1,75 @@
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class FakePaystackServer:
+    """
+    Local stand-in for the Paystack transaction list API, for exercising
+    reconciliation without network access:
+
+        server = FakePaystackServer([{"reference": "ref-1", "status": "success"}])
+        server.start()   # point PAYSTACK_BASE_URL at server.url
+        ...
+        server.stop()
+    """
+
+    def __init__(self, transactions, host="127.0.0.1", port=0):
+        self.transactions = transactions
+        self.requests = []
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                fake.requests.append(self.path)
+                if parts.path != "/transaction":
+                    self._reply(404, {"status": False, "message": "Not found"})
+                    return
+                query = parse_qs(parts.query)
+                page = int(query.get("page", ["1"])[0])
+                per_page = int(query.get("perPage", ["50"])[0])
+                start = (page - 1) * per_page
+                self._reply(200, {
+                    "status": True,
+                    "data": fake.transactions[start:start + per_page],
+                    "meta": {
+                        "total": len(fake.transactions),
+                        "page": page,
+                        "perPage": per_page,
+                        "pageCount": max(1, math.ceil(len(fake.transactions) / per_page)),
+                    },
+                })
+
+            def _reply(self, status, body):
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,37 @@
+def test_add_to_cart_prices_from_the_database_not_the_cache(app, make_user, make_product):
+    from sqlalchemy import update
+    from app.models import db, CartItem, Product
+    from app.utils.cache import product_cache
+
+    user_id, headers = make_user()
+    product_id = make_product(stock=10, price="10.00")
+    with app.app_context():
+        product_cache.get_product(product_id)
+        # a repricing this worker's cache has not seen yet
+        db.session.execute(update(Product).where(Product.product_id == product_id).values(price="12.50"))
+        db.session.commit()
+        assert float(product_cache.get_product(product_id)["price"]) == 10.0
+
+    response = app.test_client().post('/cart/add', json={"product_id": product_id, "quantity": 2}, headers=headers)
+
+    assert response.status_code == 201
+    with app.app_context():
+        item = CartItem.query.filter_by(user_id=user_id, product_id=product_id).one()
+        assert str(item.price_at_time) == "12.50"
+
+
+def test_batch_cart_prices_from_the_database(app, make_user, make_product):
+    from app.models import CartItem
+
+    user_id, headers = make_user()
+    first, second = make_product(stock=10, price="3.00"), make_product(stock=10, price="4.50")
+
+    response = app.test_client().post('/cart/batch', json={"operations": [
+        {"op": "add", "product_id": first, "quantity": 1},
+        {"op": "set", "product_id": second, "quantity": 3},
+    ]}, headers=headers)
+
+    assert response.status_code == 200
+    with app.app_context():
+        prices = {item.product_id: str(item.price_at_time) for item in CartItem.query.filter_by(user_id=user_id)}
+        assert prices == {first: "3.00", second: "4.50"}
@@ -0,0 +1,36 @@
+from tests.conftest import run_concurrently
+
+CONCURRENT_ADDS = 50
+
+
+def test_concurrent_adds_to_one_cart_line_are_not_lost(app, make_user, make_product):
+    from app.models import Cart, CartItem
+
+    user_id, headers = make_user()
+    product_id = make_product(stock=1000)
+
+    statuses = run_concurrently(app, [
+        ('POST', '/cart/add', {"product_id": product_id, "quantity": 1}, headers)
+    ] * CONCURRENT_ADDS)
+
+    assert statuses == [201] * CONCURRENT_ADDS
+    with app.app_context():
+        carts = Cart.query.filter_by(user_id=user_id, is_active=True).all()
+        assert len(carts) == 1
+        items = CartItem.query.filter_by(cart_id=carts[0].cart_id, product_id=product_id).all()
+        assert len(items) == 1
+        assert items[0].quantity == CONCURRENT_ADDS
+
+
+def test_concurrent_first_cart_views_create_one_cart(app, make_user):
+    from app.models import Cart
+
+    user_id, headers = make_user()
+
+    statuses = run_concurrently(app, [
+        ('GET', '/cart', {"user_id": user_id}, headers)
+    ] * CONCURRENT_ADDS)
+
+    assert statuses == [200] * CONCURRENT_ADDS
+    with app.app_context():
+        assert Cart.query.filter_by(user_id=user_id, is_active=True).count() == 1
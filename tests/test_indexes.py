@@ -0,0 +1,8 @@
+def test_hot_queries_use_an_index(app):
+    from app.utils.index_check import check_hot_queries
+
+    with app.app_context():
+        results = check_hot_queries()
+
+    seq_scanned = [name for name, ok in results if not ok]
+    assert seq_scanned == [], f"hot queries without a usable index: {seq_scanned}"
@@ -0,0 +1,42 @@
+ORDER_COUNT = 5
+ITEMS_PER_ORDER = 3
+
+
+def make_orders(app, user_id, product_ids):
+    from app.models import db, Order, OrderItem
+
+    with app.app_context():
+        orders = [
+            Order(user_id=user_id, total_amount="30.00", items=[
+                OrderItem(product_id=product_id, quantity=1, price="10.00") for product_id in product_ids
+            ])
+            for _ in range(ORDER_COUNT)
+        ]
+        db.session.add_all(orders)
+        db.session.commit()
+        return [order.order_id for order in orders]
+
+
+def test_order_list_stays_within_its_query_budget(app, make_user, make_product):
+    user_id, headers = make_user()
+    product_ids = [make_product(stock=10) for _ in range(ITEMS_PER_ORDER)]
+    make_orders(app, user_id, product_ids)
+
+    # QUERY_BUDGET_ENFORCE raises if the items are loaded one order at a time
+    response = app.test_client().get('/orders', json={"user_id": user_id}, headers=headers)
+
+    assert response.status_code == 200
+    orders = response.get_json()["orders"]
+    assert len(orders) == ORDER_COUNT
+    assert all(len(order["items"]) == ITEMS_PER_ORDER for order in orders)
+
+
+def test_order_detail_stays_within_its_query_budget(app, make_user, make_product):
+    user_id, headers = make_user()
+    product_ids = [make_product(stock=10) for _ in range(ITEMS_PER_ORDER)]
+    order_id = make_orders(app, user_id, product_ids)[0]
+
+    response = app.test_client().get(f'/orders/{order_id}', json={"order_id": order_id}, headers=headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()["order"]["items"]) == ITEMS_PER_ORDER
@@ -0,0 +1,93 @@
+import uuid
+from datetime import datetime, timedelta
+from tests.fake_paystack import FakePaystackServer
+
+
+def checkout(app, product_id, headers):
+    """Place an order for one unit and attach a pending payment to it."""
+    from app.models import db, Payment
+
+    response = app.test_client().post(
+        '/orders', json={"items": [{"product_id": product_id, "quantity": 1}]}, headers=headers,
+    )
+    assert response.status_code == 201
+    order = response.get_json()["order"]
+    reference = f"ref-{uuid.uuid4().hex[:12]}"
+    with app.app_context():
+        db.session.add(Payment(order_id=order["order_id"], amount=order["total_amount"], reference=reference, status='pending'))
+        db.session.commit()
+    return order["order_id"], reference
+
+
+def reconcile(app, monkeypatch, transactions):
+    from app.utils.reconcile import reconcile_command
+
+    server = FakePaystackServer(transactions).start()
+    try:
+        monkeypatch.setitem(app.config, 'PAYSTACK_BASE_URL', server.url)
+        result = app.test_cli_runner().invoke(reconcile_command, ['--per-page', '1'])
+    finally:
+        server.stop()
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_reconcile_recovers_missed_and_late_payments(app, make_user, make_product, monkeypatch):
+    from sqlalchemy import update
+    from app.models import db, Order, Payment, Product, StockReservation
+    from app.utils.stock import release_expired_reservations
+
+    product_id = make_product(stock=5, price="20.00")
+    _, headers = make_user()
+    missed_order, missed_reference = checkout(app, product_id, headers)
+    late_order, late_reference = checkout(app, product_id, headers)
+    failed_order, failed_reference = checkout(app, product_id, headers)
+
+    with app.app_context():
+        # the late order's hold runs out before Paystack confirms it
+        db.session.execute(
+            update(StockReservation).where(StockReservation.order_id == late_order)
+            .values(expires_at=datetime.utcnow() - timedelta(minutes=1))
+        )
+        db.session.commit()
+        release_expired_reservations()
+        assert db.session.get(Order, late_order).status == 'expired'
+        assert db.session.get(Product, product_id).stock == 3
+
+    output = reconcile(app, monkeypatch, [
+        {"reference": missed_reference, "status": "success", "amount": 2000},
+        {"reference": late_reference, "status": "success", "amount": 2000},
+        {"reference": failed_reference, "status": "abandoned", "amount": 2000},
+        {"reference": "ref-unknown", "status": "success", "amount": 100},
+    ])
+
+    assert "Fetched 4 transactions, 3 known locally: 2 to mark successful, 1 to mark failed" in output
+    with app.app_context():
+        payments = {p.reference: p.status for p in Payment.query.filter(
+            Payment.reference.in_([missed_reference, late_reference, failed_reference])
+        )}
+        assert payments == {missed_reference: 'successful', late_reference: 'successful', failed_reference: 'failed'}
+        assert db.session.get(Order, missed_order).status == 'paid'
+        # paid after its stock was released: the stock is taken again
+        assert db.session.get(Order, late_order).status == 'paid'
+        assert db.session.get(Product, product_id).stock == 2
+        reservations = dict(
+            db.session.query(StockReservation.order_id, StockReservation.status)
+            .filter(StockReservation.order_id.in_([missed_order, late_order]))
+        )
+        assert reservations == {missed_order: 'committed', late_order: 'committed'}
+
+
+def test_reconcile_reports_amount_mismatches_without_correcting(app, make_user, make_product, monkeypatch):
+    from app.models import db, Order, Payment
+
+    product_id = make_product(stock=5, price="20.00")
+    _, headers = make_user()
+    order_id, reference = checkout(app, product_id, headers)
+
+    output = reconcile(app, monkeypatch, [{"reference": reference, "status": "success", "amount": 100}])
+
+    assert f"Amount mismatch for {reference}" in output
+    with app.app_context():
+        assert Payment.query.filter_by(reference=reference).one().status == 'pending'
+        assert db.session.get(Order, order_id).status == 'pending'
@@ -0,0 +1,20 @@
+def test_search_runs_on_the_real_driver(app):
+    from app.models import db, Product
+    from app.utils.search import search_products
+
+    with app.app_context():
+        hoodie = Product(name="Huncho Heavyweight Hoodie", brand="huncho", price="250.00", stock=5)
+        cap = Product(name="Huncho Dad Cap", brand="huncho", price="80.00", stock=5)
+        db.session.add_all([hoodie, cap])
+        db.session.commit()
+
+        # full-text match
+        assert hoodie.product_id in [p.product_id for p in search_products("heavyweight hoodie", 10)]
+        # trigram similarity catches the typo the tsquery misses
+        assert hoodie.product_id in [p.product_id for p in search_products("Huncho Heavyweight Hodie", 10)]
+
+
+def test_search_endpoint(app):
+    response = app.test_client().get('/products/search?q=hoodie')
+    assert response.status_code == 200
+    assert 'products' in response.get_json()
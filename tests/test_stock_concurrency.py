@@ -0,0 +1,27 @@
+from tests.conftest import run_concurrently
+
+STOCK = 10
+BUYERS = 50
+
+
+def test_hot_sku_is_never_oversold(app, make_user, make_product):
+    from sqlalchemy import func
+    from app.models import db, Product, StockReservation
+
+    product_id = make_product(stock=STOCK)
+    # one buyer per request so the per-user checkout rate limit does not interfere
+    buyers = [make_user()[1] for _ in range(BUYERS)]
+
+    statuses = run_concurrently(app, [
+        ('POST', '/orders', {"items": [{"product_id": product_id, "quantity": 1}]}, headers)
+        for headers in buyers
+    ])
+
+    assert statuses.count(201) == STOCK
+    assert statuses.count(409) == BUYERS - STOCK
+    with app.app_context():
+        assert db.session.get(Product, product_id).stock == 0
+        held = db.session.query(func.sum(StockReservation.quantity)).filter_by(
+            product_id=product_id, status='held'
+        ).scalar()
+        assert held == STOCK
@@ -0,0 +1,69 @@
+import json
+import uuid
+
+
+def record(event):
+    from app.utils.payment_events import record_event
+
+    return record_event(event, json.dumps(event).encode())
+
+
+def test_events_without_an_identifier_are_not_collapsed(app):
+    from app.models import WebhookEvent
+
+    marker = uuid.uuid4().hex
+    first = {"event": "transfer.success", "data": {"note": f"{marker}-1"}}
+    second = {"event": "transfer.success", "data": {"note": f"{marker}-2"}}
+
+    with app.app_context():
+        assert record(first)
+        assert record(second)
+        # a byte-identical redelivery is still dropped
+        assert not record(first)
+        event_ids = {e.event_id for e in WebhookEvent.query.filter(WebhookEvent.event_id.like('sha256:%'))
+                     if e.payload["data"].get("note", "").startswith(marker)}
+        assert len(event_ids) == 2
+
+
+def test_redelivered_events_are_recorded_once(app):
+    reference = f"ref-{uuid.uuid4().hex[:12]}"
+    event = {"event": "charge.success", "data": {"id": reference, "reference": reference}}
+
+    with app.app_context():
+        assert record(event)
+        # Paystack may resend with a different body, e.g. an updated timestamp
+        assert not record({**event, "sent_at": "later"})
+
+
+def test_a_failing_event_does_not_charge_attempts_to_its_batch(app, monkeypatch):
+    from app.models import db, Payment, WebhookEvent
+    from app.utils import payment_events
+
+    good, bad = (f"ref-{uuid.uuid4().hex[:12]}" for _ in range(2))
+    with app.app_context():
+        db.session.add_all([
+            Payment(amount="10.00", reference=good, status='pending'),
+            Payment(amount="10.00", reference=bad, status='pending'),
+        ])
+        db.session.commit()
+        for reference in (good, bad):
+            record({"event": "charge.success", "data": {"id": reference, "reference": reference}})
+
+    mark_payments_successful = payment_events.mark_payments_successful
+
+    def fail_on_bad(references):
+        if bad in references:
+            raise RuntimeError(f"cannot apply {bad}")
+        return mark_payments_successful(references)
+
+    monkeypatch.setattr(payment_events, 'mark_payments_successful', fail_on_bad)
+    with app.app_context():
+        for _ in range(payment_events.MAX_EVENT_ATTEMPTS):
+            payment_events.process_batch()
+
+        events = {e.reference: e for e in WebhookEvent.query.filter(WebhookEvent.reference.in_([good, bad]))}
+        assert (events[good].status, events[good].attempts) == ('processed', 1)
+        assert (events[bad].status, events[bad].attempts) == ('failed', payment_events.MAX_EVENT_ATTEMPTS)
+        assert events[bad].last_error == f"cannot apply {bad}"
+        payments = dict(db.session.query(Payment.reference, Payment.status).filter(Payment.reference.in_([good, bad])))
+        assert payments == {good: 'successful', bad: 'pending'}